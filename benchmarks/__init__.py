@@ -0,0 +1 @@
+"""Benchmarks for the runtrack models layer. Run with python -m benchmarks.models --help"""
@@ -0,0 +1,274 @@
+"""Times the models layer on synthetic histories of increasing size.
+
+Usage:
+	python -m benchmarks.models --sizes 100 10000 --output results.json
+	python -m benchmarks.models --baseline results.json --threshold 1.5
+
+Results are written as JSON, keyed by benchmark name and size. With --baseline, each
+timing is compared to the saved one and the run fails if any is more than threshold
+times slower, so a path that turns quadratic again is caught.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import timeit
+from datetime import timedelta
+
+from runtrack.models.runs import Runs
+from runtrack.models.runs_array import RunsArray
+from runtrack.models.group_goal_runs import GroupGoalRuns
+
+from benchmarks.synthetic import make_history, END
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+ADDED = 1000
+
+# name -> (setup, benchmark, mutates)
+BENCHMARKS = {}
+
+
+def benchmark(name, setup, mutates=False):
+	"""registers a benchmark
+
+	:param name: name used in the results
+	:param setup: function (goals, runs) -> state, not timed
+	:param mutates: True if the benchmark changes its state, so each call needs a fresh one
+	:return: decorator for a function that takes the state
+	"""
+
+	def register(function):
+		BENCHMARKS[name] = (setup, function, mutates)
+		return function
+	return register
+
+
+def _history(goals, runs):
+	return goals, runs
+
+
+def _runs(goals, runs):
+	return Runs(runs)
+
+
+def _runs_and_new(goals, runs):
+	new_goals, new_runs = make_history(ADDED, seed=1)
+	return Runs(runs), new_runs
+
+
+def _runs_array(goals, runs):
+	return RunsArray(runs)
+
+
+def _group(goals, runs):
+	return GroupGoalRuns(goals, runs)
+
+
+def _weeks(goals, runs):
+	return GroupGoalRuns(goals, runs).weekly(dummy=True, until=END)
+
+
+@benchmark("runs.construct", _history)
+def runs_construct(state):
+	goals, runs = state
+	Runs(runs)
+
+
+@benchmark("runs.add", _runs_and_new, mutates=True)
+def runs_add(state):
+	runs_instance, new_runs = state
+	for run in new_runs:
+		runs_instance.add(run)
+
+
+@benchmark("runs.add_all", _runs_and_new, mutates=True)
+def runs_add_all(state):
+	runs_instance, new_runs = state
+	runs_instance.add_all(new_runs)
+
+
+@benchmark("runs.interval", _runs)
+def runs_interval(state):
+	for weeks_ago in range(52):
+		end = END - timedelta(weeks=weeks_ago)
+		state.interval(end - timedelta(days=6), end)
+
+
+@benchmark("runs.daily", _runs)
+def runs_daily(state):
+	state.daily()
+
+
+@benchmark("runs.daily_distances_between", _runs)
+def runs_daily_distances_between(state):
+	state.daily_distances_between(state.first().date, END)
+
+
+@benchmark("runs_array.rolling", _runs_array)
+def runs_array_rolling(state):
+	start = state.first().date
+	state.training_load_between(start, END)
+
+
+@benchmark("group_goal_runs.construct", _history)
+def group_goal_runs_construct(state):
+	goals, runs = state
+	GroupGoalRuns(goals, runs)
+
+
+@benchmark("group_goal_runs.weekly", _group)
+def group_goal_runs_weekly(state):
+	state.weekly(dummy=True, until=END)
+
+
+@benchmark("weekly.statistics", _weeks)
+def weekly_statistics(state):
+	# clear the cached statistics, so every call computes them
+	previous = None
+	for week in state:
+		week._stats = None
+		week.sum_runs()
+		week.num_runs()
+		week.longest_run()
+		week.average_run()
+		week.daily_distances()
+		if previous is not None:
+			week.compare_distance(previous)
+			week.compare_longest_run(previous)
+		previous = week
+
+
+def time_benchmark(name, goals, runs, repeat):
+	"""times one benchmark on one history
+
+	:param name: registered benchmark name
+	:param goals: list of Goal objects
+	:param runs: list of Run objects
+	:param repeat: number of timings taken
+	:return: dict with the best and median seconds per call, and the calls per timing
+	"""
+
+	setup, function, mutates = BENCHMARKS[name]
+	timings = []
+
+	if mutates:
+		number = 1
+		for _ in range(repeat):
+			state = setup(goals, runs)
+			# like timeit, keep the garbage collector out of the timing
+			gc.disable()
+			try:
+				start = time.perf_counter()
+				function(state)
+				timings.append(time.perf_counter() - start)
+			finally:
+				gc.enable()
+	else:
+		state = setup(goals, runs)
+		timer = timeit.Timer(lambda: function(state))
+		number, _ = timer.autorange()
+		timings = [total / number for total in timer.repeat(repeat, number)]
+
+	timings.sort()
+	return {"best": timings[0], "median": timings[len(timings) // 2], "number": number}
+
+
+def run(sizes, names=None, repeat=5, seed=0, log=None):
+	"""runs the benchmarks on histories of each size
+
+	:param sizes: numbers of runs in the generated histories
+	:param names: benchmark names to run, or None for all of them
+	:param repeat: number of timings taken of each benchmark
+	:param seed: random seed of the histories
+	:param log: file that progress is written to, or None
+	:return: results dict, ready to be saved as JSON
+	"""
+
+	names = names or sorted(BENCHMARKS)
+	results = {name: {} for name in names}
+
+	for size in sizes:
+		goals, runs = make_history(size, seed)
+		for name in names:
+			timing = time_benchmark(name, goals, runs, repeat)
+			results[name][str(size)] = timing
+			if log is not None:
+				log.write("{:<32} {:>8} {:>12.6f}s\n".format(name, size, timing["best"]))
+
+	return {
+		"meta": {
+			"python": platform.python_version(),
+			"machine": platform.machine(),
+			"created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+			"sizes": sizes,
+			"repeat": repeat,
+			"seed": seed,
+		},
+		"results": results,
+	}
+
+
+def compare(results, baseline):
+	"""compares results to a baseline, using the best timing of each
+
+	:param results: results dict from run()
+	:param baseline: results dict saved by an earlier run
+	:return: list of (name, size, baseline seconds, seconds, ratio) tuples, slowest ratio first,
+		for every benchmark and size found in both
+	"""
+
+	rows = []
+	for name, timings in results["results"].items():
+		for size, timing in timings.items():
+			old = baseline["results"].get(name, {}).get(size)
+			if old is not None and old["best"] > 0:
+				rows.append((name, int(size), old["best"], timing["best"], timing["best"] / old["best"]))
+
+	rows.sort(key=lambda row: row[4], reverse=True)
+	return rows
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Benchmark the runtrack models layer.")
+	parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+						help="numbers of runs in the generated histories (up to 1000000)")
+	parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run")
+	parser.add_argument("--repeat", type=int, default=5, help="timings taken of each benchmark")
+	parser.add_argument("--seed", type=int, default=0, help="random seed of the histories")
+	parser.add_argument("--output", help="file the JSON results are written to")
+	parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+	parser.add_argument("--threshold", type=float, default=1.5,
+						help="slowdown ratio that counts as a regression")
+	args = parser.parse_args(argv)
+
+	results = run(args.sizes, args.only, args.repeat, args.seed, log=sys.stderr)
+
+	if args.output:
+		with open(args.output, "w") as output:
+			json.dump(results, output, indent=2, sort_keys=True)
+	else:
+		json.dump(results, sys.stdout, indent=2, sort_keys=True)
+		sys.stdout.write("\n")
+
+	if args.baseline:
+		with open(args.baseline) as baseline_file:
+			baseline = json.load(baseline_file)
+
+		regressions = 0
+		for name, size, old, new, ratio in compare(results, baseline):
+			slower = ratio > args.threshold
+			regressions += slower
+			sys.stderr.write("{:<32} {:>8} {:>12.6f}s -> {:>12.6f}s {:>6.2f}x{}\n".format(
+				name, size, old, new, ratio, "  REGRESSION" if slower else ""))
+
+		if regressions:
+			sys.stderr.write("{} regression(s) over {}x\n".format(regressions, args.threshold))
+			return 1
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
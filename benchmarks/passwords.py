@@ -0,0 +1,114 @@
+"""Measures password hashes per second, to choose PASSWORD_HASH_ITERATIONS deliberately.
+
+Usage:
+	python -m benchmarks.passwords --iterations 100000 260000 600000
+	python -m benchmarks.passwords --method pbkdf2:sha512 --processes 4 --output hashes.json
+
+Every login checks one hash, so hashes per second per core is the login rate a
+worker process can sustain on CPU alone. With --processes, the same measurement
+runs in that many processes at once, to show how the rate holds up with every
+core busy.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from multiprocessing import Pool, cpu_count
+
+from werkzeug.security import generate_password_hash
+
+from runtrack.models.tables import hash_method
+
+
+def hashes_per_second(method, seconds=1.0):
+	"""hashes a password repeatedly for about seconds
+
+	:param method: werkzeug method string, e.g. pbkdf2:sha256:260000
+	:param seconds: how long to keep hashing
+	:return: hashes per second in this process
+	"""
+
+	count = 0
+	start = time.perf_counter()
+	deadline = start + seconds
+	while True:
+		generate_password_hash("correct horse battery staple", method=method)
+		count += 1
+		now = time.perf_counter()
+		if now >= deadline:
+			return count / (now - start)
+
+
+def _measure(args):
+	return hashes_per_second(*args)
+
+
+def run(method, iterations, seconds=1.0, processes=1):
+	"""measures the hash rate for each iteration count
+
+	:param method: werkzeug base method, e.g. pbkdf2:sha256
+	:param iterations: list of iteration counts (ignored for methods other than pbkdf2)
+	:param seconds: how long each measurement hashes for
+	:param processes: number of processes measured at once
+	:return: results dict, ready to be saved as JSON
+	"""
+
+	results = []
+	for count in iterations:
+		full_method = hash_method(method, count)
+		if processes > 1:
+			with Pool(processes) as pool:
+				rates = pool.map(_measure, [(full_method, seconds)] * processes)
+		else:
+			rates = [hashes_per_second(full_method, seconds)]
+
+		per_core = sum(rates) / len(rates)
+		results.append({
+			"method": full_method,
+			"iterations": count,
+			"hashes_per_second_per_core": per_core,
+			"milliseconds_per_hash": 1000 / per_core,
+			"hashes_per_second_total": sum(rates),
+		})
+
+	return {
+		"meta": {
+			"python": platform.python_version(),
+			"machine": platform.machine(),
+			"cpus": cpu_count(),
+			"processes": processes,
+			"seconds": seconds,
+			"created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+		},
+		"results": results,
+	}
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Measure password hashes per second per core.")
+	parser.add_argument("--method", default="pbkdf2:sha256", help="werkzeug hash method")
+	parser.add_argument("--iterations", type=int, nargs="+", default=[50000, 150000, 260000, 600000],
+						help="pbkdf2 iteration counts to measure")
+	parser.add_argument("--seconds", type=float, default=1.0, help="how long each measurement hashes for")
+	parser.add_argument("--processes", type=int, default=1, help="processes measured at once (e.g. one per core)")
+	parser.add_argument("--output", help="file the JSON results are written to")
+	args = parser.parse_args(argv)
+
+	results = run(args.method, args.iterations, args.seconds, args.processes)
+	for result in results["results"]:
+		sys.stderr.write("{:<28} {:>10.1f} hashes/s/core {:>8.2f} ms/hash\n".format(
+			result["method"], result["hashes_per_second_per_core"], result["milliseconds_per_hash"]))
+
+	if args.output:
+		with open(args.output, "w") as output:
+			json.dump(results, output, indent=2, sort_keys=True)
+	else:
+		json.dump(results, sys.stdout, indent=2, sort_keys=True)
+		sys.stdout.write("\n")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,36 @@
+"""Generates synthetic run histories for the benchmarks"""
+
+import random
+from datetime import date, timedelta
+
+from runtrack.models.records import RunRecord, GoalRecord
+
+# histories end here, and the benchmarks pad weeks only up to here, so results do not
+# depend on the day they are run
+END = date(2019, 1, 6)
+
+
+def make_history(count, seed=0, runs_per_day=1.5):
+	"""builds a shuffled history of count runs, with goals
+
+	Runs are spread over enough days that there are runs_per_day of them on an
+	average day. Goals are set on two of every three days.
+
+	:param count: number of runs
+	:param seed: random seed, so every benchmark sees the same history
+	:param runs_per_day: average number of runs on a day
+	:return: tuple of (goals, runs) lists of records, in random order
+	"""
+
+	rand = random.Random(seed)
+	days = max(1, int(count / runs_per_day))
+	start = END - timedelta(days=days - 1)
+
+	runs = [RunRecord(date=start + timedelta(days=rand.randrange(days)), distance=float(rand.randint(1, 200)) / 10)
+			for _ in range(count)]
+	goal_days = [day for day in range(days) if day % 3]
+	goals = [GoalRecord(date=start + timedelta(days=day), distance=float(rand.randint(0, 100)) / 10)
+			 for day in goal_days]
+
+	rand.shuffle(goals)
+	return goals, runs
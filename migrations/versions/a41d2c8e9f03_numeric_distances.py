@@ -0,0 +1,35 @@
+"""numeric distances
+
+Revision ID: a41d2c8e9f03
+Revises: 7c3f1a9e5b21
+Create Date: 2026-10-18 11:02:47.118930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41d2c8e9f03'
+down_revision = '7c3f1a9e5b21'
+branch_labels = None
+depends_on = None
+
+
+# the leading number of a text distance, so legacy values like '5 mi' keep their
+# number; values with none (e.g. '') become 0 rather than aborting the cast
+TO_FLOAT = r"COALESCE(substring(distance from '^\s*([0-9]+(\.[0-9]*)?|\.[0-9]+)')::double precision, 0)"
+
+
+def upgrade():
+    op.alter_column('run', 'distance', existing_type=sa.TEXT(), type_=sa.FLOAT(),
+                    postgresql_using=TO_FLOAT)
+    op.alter_column('goal', 'distance', existing_type=sa.TEXT(), type_=sa.FLOAT(),
+                    postgresql_using=TO_FLOAT)
+
+
+def downgrade():
+    op.alter_column('goal', 'distance', existing_type=sa.FLOAT(), type_=sa.TEXT(),
+                    postgresql_using='distance::text')
+    op.alter_column('run', 'distance', existing_type=sa.FLOAT(), type_=sa.TEXT(),
+                    postgresql_using='distance::text')
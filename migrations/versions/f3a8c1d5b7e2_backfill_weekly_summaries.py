@@ -0,0 +1,52 @@
+"""backfill weekly summaries
+
+Revision ID: f3a8c1d5b7e2
+Revises: d9b14f6c2e87
+Create Date: 2026-10-18 15:08:12.274519
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8c1d5b7e2'
+down_revision = 'd9b14f6c2e87'
+branch_labels = None
+depends_on = None
+
+# the Monday of the week that contains a date column, like queries.week_start
+WEEK_START = {
+    'postgresql': "CAST(date_trunc('week', {0}) AS DATE)",
+    'sqlite': "date({0}, 'weekday 0', '-6 days')",
+}
+
+
+def backfill_statements(dialect_name):
+    """SQL that rebuilds every user's weekly_summary rows from their runs and goals,
+    like weekly_summary.rebuild, and bumps every data version so no cached view
+    of the old summaries is served"""
+    week = WEEK_START[dialect_name].format('date')
+    return [
+        'DELETE FROM weekly_summary',
+        'INSERT INTO weekly_summary (user_id, monday, total_distance, goal_total, run_count, longest_run) '
+        'SELECT user_id, monday, SUM(run_distance), SUM(goal_distance), SUM(run_count), MAX(run_distance) '
+        'FROM ('
+        '  SELECT user_id, {0} AS monday, distance AS run_distance, 0 AS goal_distance, 1 AS run_count '
+        '  FROM run WHERE user_id IS NOT NULL AND date IS NOT NULL'
+        '  UNION ALL'
+        '  SELECT user_id, {0} AS monday, 0 AS run_distance, distance AS goal_distance, 0 AS run_count '
+        '  FROM goal WHERE user_id IS NOT NULL AND date IS NOT NULL'
+        ') AS entries '
+        'GROUP BY user_id, monday'.format(week),
+        'UPDATE "user" SET data_version = data_version + 1',
+    ]
+
+
+def upgrade():
+    for statement in backfill_statements(op.get_bind().dialect.name):
+        op.execute(statement)
+
+
+def downgrade():
+    # the summaries are derived data, and the table itself is dropped by 7c3f1a9e5b21
+    pass
@@ -1,7 +1,8 @@
 
 if __name__ == '__main__':
+	from config import DevelopmentConfig
 	from runtrack import create_app
-	app = create_app()
+	app = create_app(DevelopmentConfig)
 
 	# development
 	app.run(debug=True)
@@ -1,30 +1,82 @@
 """Module that contains the runtrack app."""
 
 from flask import Flask
-from config import Config
+from config import config_from_env, check_config
 
-from runtrack.models import db, migrate, login, tables
+from runtrack.models import db, migrate, login, cache, metrics, tables, identity
 from runtrack.controllers.auth import auth
 from runtrack.controllers.main import main
+from runtrack.controllers.api import api
 from runtrack.controllers.errors import errors
+from runtrack.commands import backfill_summaries, import_runs, export_runs
 
 
-def create_app():
+def engine_options(config):
+    """Builds SQLAlchemy engine options from the DB_* settings of a config.
+
+    Pool options only apply to pooled (server) databases, and the session settings
+    only to PostgreSQL, so an SQLite URI gets no options.
+    :param config: app config
+    :return: dict of keyword arguments for create_engine
+    """
+    uri = config.get("SQLALCHEMY_DATABASE_URI") or ""
+    if uri.startswith("sqlite"):
+        return {}
+
+    options = {
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+    }
+
+    if uri.startswith("postgres"):
+        connect_args = {
+            "application_name": config["DB_APPLICATION_NAME"],
+            "connect_timeout": config["DB_CONNECT_TIMEOUT"],
+        }
+        if config["DB_STATEMENT_TIMEOUT"]:
+            connect_args["options"] = "-c statement_timeout={}".format(config["DB_STATEMENT_TIMEOUT"])
+        if config["DB_SSLMODE"]:
+            connect_args["sslmode"] = config["DB_SSLMODE"]
+        options["connect_args"] = connect_args
+
+    return options
+
+
+def create_app(config_class=None):
     """Application factory for the runtrack app.
+    :param config_class: configuration object, defaults to the one named by RUNTRACK_ENV
     :return: runtrack app
     """
     # create and configure the app
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class or config_from_env())
+    check_config(app.config)
+
+    # explicit SQLALCHEMY_ENGINE_OPTIONS take precedence over the DB_* settings
+    options = engine_options(app.config)
+    options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
 
     # add extensions
     db.init_app(app)
     login.init_app(app)
     migrate.init_app(app, db)
+    cache.init_app(app)
+    metrics.init_app(app)
+    identity.init_app(app)
 
     # add routes
     app.register_blueprint(auth)
     app.register_blueprint(main)
+    app.register_blueprint(api)
     app.register_blueprint(errors)
 
+    # add commands
+    app.cli.add_command(backfill_summaries)
+    app.cli.add_command(import_runs)
+    app.cli.add_command(export_runs)
+
     return app
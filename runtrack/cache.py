@@ -0,0 +1,446 @@
+"""Caching for computed view data.
+
+Cache is a flask extension (like db and login) that stores values in one of several
+interchangeable backends, chosen by the CACHE_TYPE config value:
+
+	simple -- size-bounded, least-recently-used cache in the worker's memory
+	filesystem -- files in CACHE_DIR, shared by every worker on the machine
+	redis -- a Redis-protocol server at CACHE_REDIS_URL, shared by every worker
+
+Every backend counts its hits and misses, which the metrics extension serves with
+the request metrics. A shared backend that cannot be reached is treated as a miss,
+so an outage slows the app down rather than breaking it.
+"""
+
+import logging
+import os
+import pickle
+import socket
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from hashlib import sha1
+from threading import Lock
+from urllib.parse import urlparse
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+
+class BaseCache(ABC):
+	"""interface shared by the cache backends"""
+
+	def __init__(self, default_timeout: int = 300) -> None:
+		"""
+		:param default_timeout: seconds a value is kept when set() is not given a timeout (0 keeps it forever)
+		"""
+
+		self.default_timeout = default_timeout
+		self.hits = 0
+		self.misses = 0
+
+	def _expires_at(self, timeout: int = None) -> float:
+		"""computes the expiry time of a value set now
+
+		:param timeout: seconds the value is kept, or None for the default
+		:return: unix time at which the value expires, or 0 for never
+		"""
+
+		timeout = self.default_timeout if timeout is None else timeout
+		return time.time() + timeout if timeout else 0
+
+	def _count(self, value):
+		"""records a hit or a miss for a looked-up value
+
+		:param value: the looked-up value, None for a miss
+		:return: value
+		"""
+
+		if value is None:
+			self.misses += 1
+		else:
+			self.hits += 1
+		return value
+
+	@abstractmethod
+	def get(self, key: str):
+		"""gets the value stored under key
+
+		:param key: cache key
+		:return: the stored value, or None on a miss
+		"""
+
+	@abstractmethod
+	def set(self, key: str, value, timeout: int = None) -> None:
+		"""stores value under key
+
+		:param key: cache key
+		:param value: value to be stored (must be picklable for shared backends)
+		:param timeout: seconds the value is kept, or None for the default
+		"""
+
+	@abstractmethod
+	def delete(self, key: str) -> None:
+		"""removes key from the cache, if present
+
+		:param key: cache key
+		"""
+
+	@abstractmethod
+	def clear(self) -> None:
+		"""removes every key from the cache"""
+
+	def size(self) -> int:
+		"""gets the number of keys stored, or -1 if the backend cannot tell cheaply"""
+
+		return -1
+
+	def stats(self) -> dict:
+		"""gets the hit and miss counters
+
+		:return: dict with hits, misses and the current size
+		"""
+
+		return {"hits": self.hits, "misses": self.misses, "size": self.size()}
+
+
+class LRUCache(BaseCache):
+	"""size-bounded in-process cache that evicts the least recently used key"""
+
+	def __init__(self, threshold: int = 500, default_timeout: int = 300) -> None:
+		"""
+		:param threshold: maximum number of keys kept
+		:param default_timeout: seconds a value is kept when set() is not given a timeout
+		"""
+
+		BaseCache.__init__(self, default_timeout)
+		self.threshold = threshold
+		self._items = OrderedDict()
+		self._lock = Lock()
+
+	def get(self, key: str):
+		with self._lock:
+			expires_at, value = self._items.get(key, (0, None))
+			if expires_at and expires_at <= time.time():
+				del self._items[key]
+				value = None
+			elif value is not None:
+				self._items.move_to_end(key)
+			return self._count(value)
+
+	def set(self, key: str, value, timeout: int = None) -> None:
+		with self._lock:
+			self._items[key] = (self._expires_at(timeout), value)
+			self._items.move_to_end(key)
+			while len(self._items) > self.threshold:
+				self._items.popitem(last=False)
+
+	def delete(self, key: str) -> None:
+		with self._lock:
+			self._items.pop(key, None)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._items.clear()
+
+	def size(self) -> int:
+		return len(self._items)
+
+
+class FileSystemCache(BaseCache):
+	"""cache that keeps one pickle file per key in a directory, so every worker shares it"""
+
+	def __init__(self, directory: str, threshold: int = 500, default_timeout: int = 300) -> None:
+		"""
+		:param directory: directory that holds the cache files
+		:param threshold: number of files above which the oldest are removed
+		:param default_timeout: seconds a value is kept when set() is not given a timeout
+		"""
+
+		BaseCache.__init__(self, default_timeout)
+		self.directory = directory
+		self.threshold = threshold
+		os.makedirs(directory, exist_ok=True)
+
+	def _path(self, key: str) -> str:
+		"""gets the file that stores key"""
+
+		return os.path.join(self.directory, sha1(key.encode("utf-8")).hexdigest())
+
+	def _files(self) -> list:
+		"""gets the paths of every cache file"""
+
+		return [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+				if not name.startswith(".")]
+
+	def _prune(self) -> None:
+		"""removes the least recently written files once there are more than threshold"""
+
+		files = self._files()
+		if len(files) <= self.threshold:
+			return
+
+		def modified(path):
+			try:
+				return os.path.getmtime(path)
+			except OSError:
+				return 0
+
+		for path in sorted(files, key=modified)[:len(files) - self.threshold]:
+			try:
+				os.remove(path)
+			except OSError:
+				pass
+
+	def get(self, key: str):
+		try:
+			with open(self._path(key), "rb") as cache_file:
+				expires_at, value = pickle.load(cache_file)
+		except (OSError, EOFError, pickle.UnpicklingError):
+			return self._count(None)
+
+		if expires_at and expires_at <= time.time():
+			self.delete(key)
+			value = None
+		return self._count(value)
+
+	def set(self, key: str, value, timeout: int = None) -> None:
+		# write to a temporary file and rename it, so readers never see a partial file
+		temp_path = None
+		try:
+			descriptor, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".")
+			with os.fdopen(descriptor, "wb") as cache_file:
+				pickle.dump((self._expires_at(timeout), value), cache_file, pickle.HIGHEST_PROTOCOL)
+			os.replace(temp_path, self._path(key))
+			self._prune()
+		except OSError as error:
+			logger.warning("Skipped writing cache key %s: %s", key, error)
+			if temp_path is not None and os.path.exists(temp_path):
+				os.remove(temp_path)
+
+	def delete(self, key: str) -> None:
+		try:
+			os.remove(self._path(key))
+		except OSError:
+			pass
+
+	def clear(self) -> None:
+		for path in self._files():
+			try:
+				os.remove(path)
+			except OSError:
+				pass
+
+	def size(self) -> int:
+		return len(self._files())
+
+
+class RedisError(Exception):
+	"""error reply from a Redis-protocol server"""
+
+
+class RedisCache(BaseCache):
+	"""cache stored on a Redis-protocol server, spoken to over a single socket"""
+
+	def __init__(self, url: str = "redis://localhost:6379/0", default_timeout: int = 300,
+				 key_prefix: str = "runtrack:", socket_timeout: float = 1.0) -> None:
+		"""
+		:param url: redis://[:password@]host[:port][/db] url of the server
+		:param default_timeout: seconds a value is kept when set() is not given a timeout
+		:param key_prefix: prefix added to every key, so clear() only removes this app's keys
+		:param socket_timeout: seconds to wait on the server before giving up
+		"""
+
+		BaseCache.__init__(self, default_timeout)
+		parsed = urlparse(url)
+		self.host = parsed.hostname or "localhost"
+		self.port = parsed.port or 6379
+		self.password = parsed.password
+		self.db = int(parsed.path.lstrip("/") or 0)
+		self.key_prefix = key_prefix
+		self.socket_timeout = socket_timeout
+		self._socket = None
+		self._reader = None
+		self._lock = Lock()
+
+	def _connect(self) -> None:
+		"""opens the connection, authenticating and selecting the database
+
+		If either step fails the connection is closed, so no later command can run
+		unauthenticated or against the wrong database.
+		"""
+
+		self._socket = socket.create_connection((self.host, self.port), self.socket_timeout)
+		self._reader = self._socket.makefile("rb")
+		try:
+			if self.password:
+				self._send("AUTH", self.password)
+			if self.db:
+				self._send("SELECT", self.db)
+		except Exception:
+			self._disconnect()
+			raise
+
+	def _disconnect(self) -> None:
+		"""closes the connection, so the next command reconnects"""
+
+		if self._socket is not None:
+			self._reader.close()
+			self._socket.close()
+		self._socket, self._reader = None, None
+
+	def _send(self, *args):
+		"""sends one command and reads its reply over the open connection"""
+
+		parts = [b"*%d\r\n" % len(args)]
+		for arg in args:
+			data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+			parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+		self._socket.sendall(b"".join(parts))
+		return self._read_reply()
+
+	def _read_reply(self):
+		"""parses one RESP reply from the connection"""
+
+		line = self._reader.readline()
+		if not line:
+			raise ConnectionError("Connection closed by server")
+
+		kind, payload = line[:1], line[1:-2]
+		if kind == b"+":
+			return payload.decode("utf-8")
+		if kind == b"-":
+			raise RedisError(payload.decode("utf-8"))
+		if kind == b":":
+			return int(payload)
+		if kind == b"$":
+			length = int(payload)
+			if length < 0:
+				return None
+			data = self._reader.read(length + 2)
+			return data[:-2]
+		if kind == b"*":
+			length = int(payload)
+			return None if length < 0 else [self._read_reply() for _ in range(length)]
+		raise RedisError("Unknown reply: {!r}".format(line))
+
+	def command(self, *args):
+		"""runs a command on the server, reconnecting once if the connection dropped
+
+		:param args: command name and arguments
+		:return: the decoded reply
+		"""
+
+		with self._lock:
+			for attempt in range(2):
+				try:
+					if self._socket is None:
+						self._connect()
+					return self._send(*args)
+				except (OSError, ConnectionError):
+					self._disconnect()
+					if attempt:
+						raise
+
+	def get(self, key: str):
+		try:
+			data = self.command("GET", self.key_prefix + key)
+		except (OSError, ConnectionError, RedisError) as error:
+			logger.warning("Cache server unavailable, reading %s as a miss: %s", key, error)
+			data = None
+		return self._count(None if data is None else pickle.loads(data))
+
+	def set(self, key: str, value, timeout: int = None) -> None:
+		timeout = self.default_timeout if timeout is None else timeout
+		data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+		try:
+			if timeout:
+				self.command("SET", self.key_prefix + key, data, "EX", timeout)
+			else:
+				self.command("SET", self.key_prefix + key, data)
+		except (OSError, ConnectionError, RedisError) as error:
+			logger.warning("Cache server unavailable, skipped writing %s: %s", key, error)
+
+	def delete(self, key: str) -> None:
+		try:
+			self.command("DEL", self.key_prefix + key)
+		except (OSError, ConnectionError, RedisError) as error:
+			logger.warning("Cache server unavailable, skipped deleting %s: %s", key, error)
+
+	def clear(self) -> None:
+		cursor = "0"
+		try:
+			while True:
+				cursor, keys = self.command("SCAN", cursor, "MATCH", self.key_prefix + "*", "COUNT", 500)
+				if keys:
+					self.command("DEL", *keys)
+				cursor = cursor.decode("utf-8")
+				if cursor == "0":
+					break
+		except (OSError, ConnectionError, RedisError) as error:
+			logger.warning("Cache server unavailable, skipped clearing: %s", error)
+
+
+class Cache:
+	"""flask extension that gives the app the cache backend chosen in its config"""
+
+	def __init__(self, app=None) -> None:
+		if app is not None:
+			self.init_app(app)
+
+	def init_app(self, app) -> None:
+		"""creates the app's cache backend
+
+		:param app: flask app
+		"""
+
+		app.config.setdefault("CACHE_TYPE", "simple")
+		app.config.setdefault("CACHE_DEFAULT_TIMEOUT", 300)
+		app.config.setdefault("CACHE_THRESHOLD", 500)
+		app.config.setdefault("CACHE_DIR", os.path.join(tempfile.gettempdir(), "runtrack-cache"))
+		app.config.setdefault("CACHE_REDIS_URL", "redis://localhost:6379/0")
+		app.config.setdefault("CACHE_KEY_PREFIX", "runtrack:")
+
+		app.extensions["cache"] = Cache.create_backend(app.config)
+
+	@staticmethod
+	def create_backend(config) -> BaseCache:
+		"""builds the backend named by config["CACHE_TYPE"]
+
+		:param config: app config
+		:return: cache backend
+		"""
+
+		cache_type = config["CACHE_TYPE"]
+		timeout = config["CACHE_DEFAULT_TIMEOUT"]
+
+		if cache_type == "simple":
+			return LRUCache(config["CACHE_THRESHOLD"], timeout)
+		if cache_type == "filesystem":
+			return FileSystemCache(config["CACHE_DIR"], config["CACHE_THRESHOLD"], timeout)
+		if cache_type == "redis":
+			return RedisCache(config["CACHE_REDIS_URL"], timeout, config["CACHE_KEY_PREFIX"])
+		raise ValueError("Unknown CACHE_TYPE: {}".format(cache_type))
+
+	@property
+	def backend(self) -> BaseCache:
+		"""the cache backend of the current app"""
+
+		return current_app.extensions["cache"]
+
+	def get(self, key: str):
+		return self.backend.get(key)
+
+	def set(self, key: str, value, timeout: int = None) -> None:
+		self.backend.set(key, value, timeout)
+
+	def delete(self, key: str) -> None:
+		self.backend.delete(key)
+
+	def clear(self) -> None:
+		self.backend.clear()
+
+	def stats(self) -> dict:
+		return self.backend.stats()
@@ -0,0 +1,77 @@
+"""flask command line commands for maintaining the runtrack database"""
+
+import os
+
+import click
+from flask.cli import with_appcontext
+
+from runtrack.models import db
+from runtrack.models.tables import User
+from runtrack.models import weekly_summary, importer, exporter, dashboard
+
+
+@click.command("backfill-summaries")
+@click.option("--user-id", type=int, default=None, help="Only rebuild this user's summaries.")
+@with_appcontext
+def backfill_summaries(user_id):
+    """Rebuild the weekly_summary table from every user's runs and goals."""
+    users = User.query.filter_by(id=user_id).all() if user_id else User.query.all()
+
+    for user in users:
+        weekly_summary.rebuild(user)
+        # the rebuilt totals must not be answered from cached dashboards or ETags
+        dashboard.bump_data_version(user.id)
+        db.session.commit()
+
+    click.echo("Rebuilt weekly summaries for {} user(s).".format(len(users)))
+
+
+@click.command("import-runs")
+@click.argument("email")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "file_format", type=click.Choice(["csv", "gpx"]), default=None,
+              help="File format, if it is not given by the file extension.")
+@click.option("--batch-size", type=int, default=1000, help="Rows per INSERT statement.")
+@with_appcontext
+def import_runs(email, path, file_format, batch_size):
+    """Import runs and goals for the user with EMAIL from a CSV or GPX file."""
+    user = User.query.filter_by(email=email).first()
+    if user is None:
+        raise click.ClickException("No user with email {}".format(email))
+
+    file_format = file_format or path.rsplit(".", 1)[-1].lower()
+    with open(path, "rb") as stream:
+        try:
+            result = importer.import_file(user.id, stream, file_format, batch_size)
+        except ValueError as error:
+            raise click.ClickException(str(error))
+
+    if result.errors:
+        for error in result.errors:
+            click.echo(error, err=True)
+        raise click.ClickException("Nothing was imported.")
+
+    click.echo("Imported {} runs and {} goals.".format(result.runs, result.goals))
+
+
+@click.command("export-runs")
+@click.argument("directory", type=click.Path(file_okay=False))
+@click.option("--format", "file_format", type=click.Choice(sorted(exporter.FORMATS)), default="csv",
+              help="File format of the exports.")
+@click.option("--user-id", type=int, default=None, help="Only export this user's history.")
+@with_appcontext
+def export_runs(directory, file_format, user_id):
+    """Back up every user's runs and goals to DIRECTORY, one file per user."""
+    os.makedirs(directory, exist_ok=True)
+    query = db.session.query(User.id).order_by(User.id)
+    if user_id:
+        query = query.filter(User.id == user_id)
+    user_ids = [user_id for user_id, in query.all()]
+
+    for user_id in user_ids:
+        path = os.path.join(directory, "user-{}.{}".format(user_id, file_format))
+        with open(path, "w", encoding="utf-8", newline="") as stream:
+            for chunk in exporter.export(user_id, file_format):
+                stream.write(chunk)
+
+    click.echo("Exported {} user(s) to {}.".format(len(user_ids), directory))
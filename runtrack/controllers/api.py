@@ -0,0 +1,103 @@
+"""JSON endpoints that serve the data behind the charts.
+
+Responses carry a strong ETag built from the user's data version, so browsers
+revalidate them with If-None-Match and get an empty 304 while nothing has changed.
+"""
+
+from datetime import date, datetime, timedelta
+
+from flask import jsonify, request, abort, Response, Blueprint
+from flask_login import current_user, login_required
+
+from runtrack.models import dashboard, queries
+
+api = Blueprint("api", __name__, url_prefix="/api")
+
+WEEKDAYS = ["Mon", "Tues", "Wed", "Thurs", "Fri", "Sat", "Sun"]
+
+
+def conditional_json(etag, build):
+    """helper method that answers a conditional GET with JSON data
+
+    :param etag: strong ETag of the current data
+    :param build: function that returns the data; only called if the client's copy is stale
+    :return: 200 response with the data, or an empty 304 response
+    """
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    # let browsers keep the data, but make them revalidate it on every use
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def dashboard_series(labels_key, **series_keys):
+    """helper method that serves series of the (cached) dashboard view model
+
+    The dashboard depends on the day as well as the data, so both are in the ETag.
+
+    :param labels_key: view model key of the labels
+    :param series_keys: response key -> view model key of each series
+    """
+    user = current_user
+    etag = "dashboard-{}-{}-{}".format(user.id, user.data_version, date.today().isoformat())
+
+    def build():
+        data = dashboard.dashboard(user)
+        series = {"labels": data[labels_key]}
+        series.update((name, data[key]) for name, key in series_keys.items())
+        return series
+
+    return conditional_json(etag, build)
+
+
+@api.route("/charts/daily")
+@login_required
+def daily_chart():
+    """Distances run on each of the last 7 days."""
+    return dashboard_series("days", data="daily_runs")
+
+
+@api.route("/charts/weekly")
+@login_required
+def weekly_chart():
+    """Distances run in each of the last 4 weeks."""
+    return dashboard_series("weeks", data="weekly_runs")
+
+
+@api.route("/charts/alltime")
+@login_required
+def alltime_chart():
+    """Distances run in every week."""
+    return dashboard_series("alltime_weeks", data="alltime_runs")
+
+
+@api.route("/charts/load")
+@login_required
+def load_chart():
+    """Rolling 7 and 28 day training load, workload ratio and average run on each recent day."""
+    return dashboard_series("load_days", acute="acute_load", chronic="chronic_load", ratio="workload_ratio",
+                            average_run="average_run")
+
+
+@api.route("/charts/week/<monday>")
+@login_required
+def week_chart(monday):
+    """Distances run on each day of the week starting on monday (YYYY-MM-DD)."""
+    try:
+        monday = datetime.strptime(monday, "%Y-%m-%d").date()
+    except ValueError:
+        abort(404)
+    if monday.weekday() != 0:
+        abort(404)
+
+    user = current_user
+    etag = "week-{}-{}-{}".format(user.id, user.data_version, monday.isoformat())
+
+    def build():
+        return {"labels": WEEKDAYS,
+                "data": queries.daily_distances_between(user.id, monday, monday + timedelta(days=6))}
+
+    return conditional_json(etag, build)
@@ -7,6 +7,7 @@ from flask import render_template, url_for, flash, redirect, Blueprint
 from flask_login import login_user, current_user
 from runtrack.views.forms import RegistrationForm
 from runtrack.models.tables import User
+from runtrack.models import identity
 
 # blue print to handle authentication
 auth = Blueprint("accounts", __name__)
@@ -15,15 +16,17 @@ auth = Blueprint("accounts", __name__)
 @auth.route('/logout')
 def logout():
     """route for the logout page. Logs a user out of their account."""
+    if current_user.is_authenticated:
+        identity.forget(current_user.id)
     logout_user()
-    return redirect(url_for('login'))
+    return redirect(url_for('accounts.login'))
 
 
 @auth.route("/login", methods=["GET", "POST"])
 def login():
     """route for the login page"""
     if current_user.is_authenticated:
-        return redirect(url_for('accounts.index'))
+        return redirect(url_for('main.index'))
 
     form = LoginForm()
 
@@ -31,10 +34,16 @@ def login():
         user = User.query.filter_by(email=form.email.data).first()
         if user is None or not user.check_password(form.password.data):
             flash('Invalid email or password')
-            return redirect(url_for('login'))
+            return redirect(url_for('accounts.login'))
+
+        # upgrade hashes made with old parameters while the password is at hand
+        if user.password_needs_rehash():
+            user.set_password(form.password.data)
+            db.session.commit()
 
         login_user(user, remember=form.remember_me.data)
-        return redirect(url_for('accounts.index'))
+        identity.remember(user)
+        return redirect(url_for('main.index'))
 
     return render_template("auth/login.html", form=form)
 
@@ -43,7 +52,7 @@ def login():
 def register():
     """route for the register page"""
     if current_user.is_authenticated:
-        return redirect(url_for('accounts.index'))
+        return redirect(url_for('main.index'))
 
     form = RegistrationForm()
     if form.validate_on_submit():
@@ -54,6 +63,6 @@ def register():
 
         login_user(user, remember=form.remember_me.data)
         flash("Welcome to runtrack!")
-        return redirect(url_for('accounts.index'))
+        return redirect(url_for('main.index'))
 
     return render_template("auth/register.html", form=form)
@@ -1,16 +1,17 @@
 """controllers that deal with a user's main"""
 
-from datetime import date, timedelta
-from calendar import day_abbr, month_name
+from datetime import datetime, timedelta
+from calendar import month_name
 
-from flask import render_template, flash, redirect, Blueprint
+from flask import render_template, flash, redirect, request, abort, current_app, Blueprint, Response, \
+    stream_with_context
 from flask_login import current_user, login_required
 
 from runtrack.models import db
-from runtrack.views.forms import AddGoalForm, AddRunForm
+from runtrack.views.forms import AddGoalForm, AddRunForm, ImportForm
 from runtrack.models.tables import Run, Goal
-from runtrack.models.group_goal_runs import GroupGoalRuns, GroupGoalRunsWeekly
-from runtrack.models.runs import Runs
+from runtrack.models.group_goal_runs import iter_goal_runs, iter_weekly, week_of
+from runtrack.models import weekly_summary, queries, dashboard, importer, exporter
 
 main = Blueprint("main", __name__)
 
@@ -28,34 +29,8 @@ def readable_date(input_date):
 @main.route("/index")
 @login_required
 def index():
-    """index page for the main section of the app."""
-    user = current_user
-    today = date.today()
-    new_runs = Runs(user.runs)
-
-    # Get last week main distances
-    week_ago = today - timedelta(days=6)
-    daily_runs = new_runs.daily_distances_between(week_ago, today)
-
-    # Get last 7 weekdays
-    days = []
-    for day_int in range(today.weekday()-6, today.weekday()+1):
-        day = day_int % 7
-        days.append(day_abbr[day])
-
-    # Get alltime distances
-    alltime_ggr = GroupGoalRuns(user.goals, user.runs).weekly(dummy=True, at_least=4)
-    alltime_runs = GroupGoalRunsWeekly.weekly_distances(alltime_ggr)
-
-    # Get alltime weekdays
-    alltime_weeks = list(map(lambda wggr: wggr.name(), alltime_ggr))
-
-    # Get weekly data
-    weekly_runs = alltime_runs[-4:]
-    weeks = alltime_weeks[-4:]
-
-    return render_template("main/index.html", days=days, daily_runs=daily_runs, weeks=weeks,
-                           weekly_runs=weekly_runs, alltime_weeks=alltime_weeks, alltime_runs=alltime_runs)
+    """index page for the main section of the app. The charts load their data from the api blueprint."""
+    return render_template("main/index.html")
 
 
 @main.route("/add_goal", methods=["GET", "POST"])
@@ -66,15 +41,21 @@ def add_goal():
     form = AddGoalForm()
 
     if form.validate_on_submit():
-        goal_check = Goal.query.filter_by(user_id=user.id, date=form.date.data).first()
+        # lock the goal so a concurrent update cannot read the same previous distance
+        goal_check = Goal.query.filter_by(user_id=user.id, date=form.date.data).with_for_update().first()
         if not goal_check:
             goal = Goal(distance=form.distance.data, user_id = user.id, date=form.date.data)
             db.session.add(goal)
+            weekly_summary.record_goal(goal)
+            dashboard.bump_data_version(user.id)
             db.session.commit()
             flash('Your goal has been added!')
         else:
+            previous_distance = goal_check.distance
             goal_check.distance = form.distance.data
             db.session.add(goal_check)
+            weekly_summary.record_goal(goal_check, previous_distance)
+            dashboard.bump_data_version(user.id)
             db.session.commit()
             flash('Your goal has been updated!')
 
@@ -92,6 +73,8 @@ def add_run():
     if form.validate_on_submit():
         run = Run(distance=form.distance.data, date=form.date.data, user_id=user.id)
         db.session.add(run)
+        weekly_summary.record_run(run)
+        dashboard.bump_data_version(user.id)
         db.session.commit()
 
         flash('Your run has been added!')
@@ -99,15 +82,103 @@ def add_run():
     return render_template("main/add_run.html", form=form)
 
 
+@main.route("/import", methods=["GET", "POST"])
+@login_required
+def import_runs():
+    """Import runs and goals from an uploaded CSV or GPX file."""
+    user = current_user
+    form = ImportForm()
+    errors = []
+
+    if form.validate_on_submit():
+        upload = form.file.data
+        file_format = upload.filename.rsplit(".", 1)[-1].lower()
+        try:
+            result = importer.import_file(user.id, upload.stream, file_format)
+        except ValueError as error:
+            # includes UnicodeDecodeError from files that are not UTF-8 text
+            errors = ["could not read file: {}".format(error)]
+        else:
+            errors = result.errors
+            if not errors:
+                flash('Imported {} runs and {} goals!'.format(result.runs, result.goals))
+                return redirect('main')
+
+    return render_template("main/import.html", form=form, errors=errors)
+
+
+@main.route("/export.<file_format>")
+@login_required
+def export_runs(file_format):
+    """Download all of a user's runs and goals as CSV or JSON lines, streamed in chunks."""
+    if file_format not in exporter.FORMATS:
+        abort(404)
+
+    chunks = exporter.export(current_user.id, file_format)
+    return Response(stream_with_context(chunks), mimetype=exporter.FORMATS[file_format],
+                    headers={"Content-Disposition": "attachment; filename=runtrack.{}".format(file_format)})
+
+
+def week_page(user_id, before=None):
+    """helper method that loads one page of a user's weeks, newest first
+
+    :param user_id: id of the user
+    :param before: only weeks starting before this Monday, or None for the newest page
+    :return: tuple of (weeks, older_week, next_before), where older_week is the week
+        just after the page (for week-over-week comparisons) and next_before is the
+        cursor for the next page, or None if this is the last page
+    """
+    page_weeks = current_app.config["RUNS_PAGE_WEEKS"]
+    # the summaries can list a Monday whose rows add up to nothing, such as a goal
+    # changed back to 0 leaving float residue, so page by the weeks actually built
+    # and keep reading older Mondays until there is one more week than the page
+    weeks = []
+    cursor = None if before is None else week_of(before - timedelta(days=1)) + timedelta(days=7)
+    while len(weeks) <= page_weeks:
+        mondays = weekly_summary.mondays_before(user_id, cursor, limit=page_weeks + 1 - len(weeks))
+        if not mondays:
+            break
+
+        end_date = mondays[0] + timedelta(days=6) if cursor is None else cursor - timedelta(days=1)
+        goals, runs = queries.stream_window(user_id, mondays[-1], end_date)
+        weeks.extend(list(iter_weekly(iter_goal_runs(goals, runs)))[::-1])
+        cursor = mondays[-1]
+
+    if len(weeks) <= page_weeks:
+        return weeks, None, None
+    return weeks[:page_weeks], weeks[page_weeks], weeks[page_weeks - 1].monday.isoformat()
+
+
+def parse_before():
+    """helper method that reads the ?before=<monday> page cursor
+
+    :return: date object, or None if no cursor was given
+    """
+    before = request.args.get("before")
+    if before is None:
+        return None
+
+    try:
+        return datetime.strptime(before, "%Y-%m-%d").date()
+    except ValueError:
+        abort(400)
+
+
 @main.route("/main")
 @login_required
 def runs():
-    """Route that displays a users running data"""
-    user = current_user
+    """Route that displays a users running data, one page of weeks at a time"""
+    weeks, older_week, next_before = week_page(current_user.id, parse_before())
+
+    return render_template("main/runs.html", weeks=weeks, older_week=older_week, next_before=next_before,
+                           len=len, readable_date=readable_date)
 
-    grouped_goalruns = GroupGoalRuns(goals=user.goals, runs=user.runs)
-    weeks = grouped_goalruns.weekly()[::-1]
 
-    # weekdays = list(map(lambda i: day_abbr[i], range(7)))
+@main.route("/main/weeks")
+@login_required
+def runs_weeks():
+    """Route that renders the next page of weeks for the "load more" button"""
+    weeks, older_week, next_before = week_page(current_user.id, parse_before())
 
-    return render_template("main/runs.html", weeks=weeks, float=float, len=len, readable_date=readable_date)
+    return render_template("main/_weeks.html", weeks=weeks, older_week=older_week, next_before=next_before,
+                           len=len, readable_date=readable_date)
@@ -0,0 +1,293 @@
+"""Request instrumentation, exposed in Prometheus text format.
+
+Metrics is a flask extension (like cache) that records, per endpoint:
+
+	runtrack_requests_total -- requests, by method and response status
+	runtrack_request_duration_seconds -- histogram of request latency
+	runtrack_request_sql_statements -- histogram of SQL statements run per request
+	runtrack_request_sql_duration_seconds -- histogram of time spent in SQL per request
+
+and runtrack_template_render_seconds, a histogram of render time per template. The
+cache backend's counters are reported as runtrack_cache_hits_total,
+runtrack_cache_misses_total and runtrack_cache_size, read when the metrics are served.
+
+SQL is measured with SQLAlchemy cursor events, and templates with a timed Jinja
+template class. Values are kept in the worker's memory, so each worker reports its own.
+
+Nothing is recorded unless METRICS_ENABLED is set, and the metrics are only served to
+scrapers that send METRICS_TOKEN as a bearer token or connect from one of
+METRICS_ALLOWED_ADDRESSES; everyone else gets a 404.
+"""
+
+import hmac
+import time
+from bisect import bisect_left
+from threading import Lock
+
+from flask import g, request, current_app, has_request_context, has_app_context, Response, abort
+from jinja2 import Template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+	"""escapes a label value for the text format"""
+
+	return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra="") -> str:
+	"""formats a label set, e.g. {endpoint="main.runs",method="GET"}"""
+
+	pairs = ['{}="{}"'.format(name, _escape(value)) for name, value in zip(names, values)]
+	if extra:
+		pairs.append(extra)
+	return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+	"""formats a sample value"""
+
+	return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+	"""monotonically increasing count for each label set"""
+
+	kind = "counter"
+
+	def __init__(self, name: str, documentation: str, label_names=()) -> None:
+		self.name = name
+		self.documentation = documentation
+		self.label_names = tuple(label_names)
+		self._values = {}
+		self._lock = Lock()
+
+	def inc(self, labels=(), amount: float = 1) -> None:
+		"""adds amount to the count of a label set
+
+		:param labels: tuple of label values, in the order of label_names
+		:param amount: non-negative amount added
+		"""
+
+		with self._lock:
+			self._values[labels] = self._values.get(labels, 0) + amount
+
+	def samples(self):
+		"""yields the lines of every sample"""
+
+		with self._lock:
+			values = sorted(self._values.items())
+		for labels, value in values:
+			yield "{}{} {}".format(self.name, _labels(self.label_names, labels), _number(value))
+
+
+class Histogram:
+	"""observations counted into cumulative buckets, for each label set"""
+
+	kind = "histogram"
+
+	def __init__(self, name: str, documentation: str, label_names=(), buckets=LATENCY_BUCKETS) -> None:
+		self.name = name
+		self.documentation = documentation
+		self.label_names = tuple(label_names)
+		self.buckets = tuple(buckets)
+		# label set -> [count per bucket (the last one is +Inf), sum]
+		self._values = {}
+		self._lock = Lock()
+
+	def observe(self, value: float, labels=()) -> None:
+		"""counts one observation
+
+		:param value: observed value
+		:param labels: tuple of label values, in the order of label_names
+		"""
+
+		with self._lock:
+			counts, total = self._values.get(labels) or ([0] * (len(self.buckets) + 1), 0)
+			counts[bisect_left(self.buckets, value)] += 1
+			self._values[labels] = counts, total + value
+
+	def samples(self):
+		"""yields the lines of every sample"""
+
+		with self._lock:
+			values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+
+		for labels, (counts, total) in values:
+			cumulative = 0
+			bounds = [_number(float(bound)) for bound in self.buckets] + ["+Inf"]
+			for bound, count in zip(bounds, counts):
+				cumulative += count
+				yield "{}_bucket{} {}".format(self.name, _labels(self.label_names, labels, 'le="{}"'.format(bound)),
+											  cumulative)
+			yield "{}_sum{} {}".format(self.name, _labels(self.label_names, labels), _number(float(total)))
+			yield "{}_count{} {}".format(self.name, _labels(self.label_names, labels), cumulative)
+
+
+class Sampled:
+	"""a value kept elsewhere, such as a cache counter, read each time the metrics are rendered"""
+
+	def __init__(self, name: str, documentation: str, kind: str, read) -> None:
+		"""
+		:param kind: "counter" or "gauge"
+		:param read: function that returns the current value, or None if it is unknown
+		"""
+
+		self.name = name
+		self.documentation = documentation
+		self.kind = kind
+		self.read = read
+
+	def samples(self):
+		"""yields the line of the sample, if the value is known"""
+
+		value = self.read()
+		if value is not None:
+			yield "{} {}".format(self.name, _number(value))
+
+
+class TimedTemplate(Template):
+	"""Jinja template that reports how long each render takes"""
+
+	def render(self, *args, **kwargs):
+		start = time.perf_counter()
+		try:
+			return Template.render(self, *args, **kwargs)
+		finally:
+			if has_app_context() and "metrics" in current_app.extensions:
+				current_app.extensions["metrics"].template_seconds.observe(
+					time.perf_counter() - start, (self.name or "<string>",))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+	conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+	elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+	if has_request_context() and "metrics" in g:
+		g.metrics["sql_statements"] += 1
+		g.metrics["sql_seconds"] += elapsed
+
+
+class MetricsRegistry:
+	"""the metrics recorded for one app"""
+
+	def __init__(self, cache=None) -> None:
+		"""
+		:param cache: the app's cache backend, whose counters are reported, or None
+		"""
+
+		self.requests = Counter("runtrack_requests_total", "Requests handled.",
+								("endpoint", "method", "status"))
+		self.request_seconds = Histogram("runtrack_request_duration_seconds", "Request latency in seconds.",
+										 ("endpoint", "method"))
+		self.sql_statements = Histogram("runtrack_request_sql_statements", "SQL statements run per request.",
+										("endpoint",), STATEMENT_BUCKETS)
+		self.sql_seconds = Histogram("runtrack_request_sql_duration_seconds",
+									 "Seconds spent running SQL per request.", ("endpoint",))
+		self.template_seconds = Histogram("runtrack_template_render_seconds", "Template render time in seconds.",
+										  ("template",))
+		self.sampled = []
+		if cache is not None:
+
+			def cache_size():
+				# -1 for backends that cannot count their keys cheaply
+				size = cache.size()
+				return size if size >= 0 else None
+
+			self.sampled = [
+				Sampled("runtrack_cache_hits_total", "Cache lookups that found a value.", "counter",
+						lambda: cache.hits),
+				Sampled("runtrack_cache_misses_total", "Cache lookups that found nothing.", "counter",
+						lambda: cache.misses),
+				Sampled("runtrack_cache_size", "Keys stored in the cache.", "gauge", cache_size),
+			]
+
+	def render(self) -> str:
+		"""formats every metric in the Prometheus text format
+
+		:return: exposition text
+		"""
+
+		lines = []
+		for metric in [self.requests, self.request_seconds, self.sql_statements, self.sql_seconds,
+					   self.template_seconds] + self.sampled:
+			lines.append("# HELP {} {}".format(metric.name, metric.documentation))
+			lines.append("# TYPE {} {}".format(metric.name, metric.kind))
+			lines.extend(metric.samples())
+		return "\n".join(lines) + "\n"
+
+
+class Metrics:
+	"""flask extension that instruments the app's requests and serves them at METRICS_ENDPOINT"""
+
+	def __init__(self, app=None) -> None:
+		if app is not None:
+			self.init_app(app)
+
+	def init_app(self, app) -> None:
+		"""registers the request hooks, the SQL and template timers, and the metrics view
+
+		:param app: flask app
+		"""
+
+		app.config.setdefault("METRICS_ENABLED", False)
+		app.config.setdefault("METRICS_ENDPOINT", "/metrics")
+		app.config.setdefault("METRICS_TOKEN", None)
+		app.config.setdefault("METRICS_ALLOWED_ADDRESSES", [])
+		if not app.config["METRICS_ENABLED"]:
+			return
+
+		registry = MetricsRegistry(app.extensions.get("cache"))
+		app.extensions["metrics"] = registry
+
+		# cursor events fire for every engine, so they are registered once per process
+		if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+			event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+			event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+		app.jinja_env.template_class = TimedTemplate
+		app.before_request(Metrics._start_request)
+		app.after_request(Metrics._finish_request)
+		app.add_url_rule(app.config["METRICS_ENDPOINT"], "metrics", Metrics._view)
+
+	@staticmethod
+	def _start_request() -> None:
+		g.metrics = {"start": time.perf_counter(), "sql_statements": 0, "sql_seconds": 0.0}
+
+	@staticmethod
+	def _finish_request(response):
+		if "metrics" not in g:
+			return response
+
+		registry = current_app.extensions["metrics"]
+		endpoint = request.endpoint or "<unmatched>"
+		elapsed = time.perf_counter() - g.metrics["start"]
+
+		registry.requests.inc((endpoint, request.method, str(response.status_code)))
+		registry.request_seconds.observe(elapsed, (endpoint, request.method))
+		registry.sql_statements.observe(g.metrics["sql_statements"], (endpoint,))
+		registry.sql_seconds.observe(g.metrics["sql_seconds"], (endpoint,))
+		return response
+
+	@staticmethod
+	def _allowed() -> bool:
+		"""checks whether the request may read the metrics"""
+
+		token = current_app.config["METRICS_TOKEN"]
+		authorization = request.headers.get("Authorization", "")
+		if token and hmac.compare_digest(authorization.encode("utf-8"), "Bearer {}".format(token).encode("utf-8")):
+			return True
+		return request.remote_addr in current_app.config["METRICS_ALLOWED_ADDRESSES"]
+
+	@staticmethod
+	def _view():
+		if not Metrics._allowed():
+			abort(404)
+		return Response(current_app.extensions["metrics"].render(), content_type=CONTENT_TYPE)
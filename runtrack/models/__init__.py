@@ -1,8 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
+from runtrack.cache import Cache
+from runtrack.metrics import Metrics
 
 db = SQLAlchemy()  # instantiate the database
 migrate = Migrate()  # instantiate flask migration
 login = LoginManager()  # instantiate the login manager
+cache = Cache()  # instantiate the cache
+metrics = Metrics()  # instantiate the request metrics
 login.login_view = 'accounts.login'
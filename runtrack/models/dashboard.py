@@ -0,0 +1,92 @@
+"""Builds (and caches) the data behind the dashboard on the index page"""
+
+from datetime import date, timedelta
+from calendar import day_abbr, month_abbr
+
+from runtrack.models import cache
+from runtrack.models.tables import User
+from runtrack.models.group_goal_runs import week_name
+from runtrack.models.runs_array import RunsArray
+from runtrack.models import weekly_summary, queries
+
+# days shown on the training load chart, and its rolling windows
+LOAD_DAYS = 84
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+
+# bump when the view model's keys change, so entries cached by older code are not served
+CACHE_VERSION = 2
+
+
+def bump_data_version(user_id: int) -> None:
+	"""marks a user's runs and goals as changed. The caller commits the session.
+
+	:param user_id: id of the user
+	"""
+
+	User.query.filter_by(id=user_id).update({User.data_version: User.data_version + 1}, synchronize_session=False)
+
+
+def build_dashboard(user_id: int, today: date) -> dict:
+	"""computes the dashboard view model
+
+	:param user_id: id of the user
+	:param today: last day shown
+	:return: dict of template variables for main/index.html
+	"""
+
+	# Get last week main distances, aggregated by the database
+	week_ago = today - timedelta(days=6)
+	daily_runs = queries.daily_distances_between(user_id, week_ago, today)
+
+	# Get last 7 weekdays
+	days = [day_abbr[day_int % 7] for day_int in range(today.weekday() - 6, today.weekday() + 1)]
+
+	# Get alltime distances from the precomputed weekly summaries
+	alltime_totals = weekly_summary.weekly_totals(user_id, at_least=4)
+	alltime_runs = [total for monday, total in alltime_totals]
+	alltime_weeks = [week_name(monday) for monday, total in alltime_totals]
+
+	# Get rolling training load, from the runs of the chart's days and the chronic window before them
+	load_start = today - timedelta(days=LOAD_DAYS - 1)
+	runs = RunsArray(queries.load_runs(user_id, load_start - timedelta(days=CHRONIC_DAYS - 1), today))
+	load = runs.training_load_between(load_start, today, ACUTE_DAYS, CHRONIC_DAYS)
+
+	def rounded(values):
+		return [None if value is None else round(value, 2) for value in values]
+
+	return {
+		"days": days,
+		"daily_runs": daily_runs,
+		"weeks": alltime_weeks[-4:],
+		"weekly_runs": alltime_runs[-4:],
+		"alltime_weeks": alltime_weeks,
+		"alltime_runs": alltime_runs,
+		"load_days": [month_abbr[day.month] + " " + str(day.day)
+					  for day in (load_start + timedelta(days=offset) for offset in range(LOAD_DAYS))],
+		"acute_load": rounded(load["acute"]),
+		# the chronic total per acute window, so both loads share an axis
+		"chronic_load": rounded(total * ACUTE_DAYS / CHRONIC_DAYS for total in load["chronic"]),
+		"workload_ratio": rounded(load["ratio"]),
+		"average_run": rounded(load["average_run"]),
+	}
+
+
+def dashboard(user: User) -> dict:
+	"""gets the dashboard view model from the cache, computing it on a miss
+
+	Entries are keyed by the user's data version (and the day), so a write makes
+	the old entry unreachable and it ages out of the cache.
+
+	:param user: User object
+	:return: dict of template variables for main/index.html
+	"""
+
+	today = date.today()
+	key = "dashboard:{}:{}:{}:{}".format(CACHE_VERSION, user.id, user.data_version, today.isoformat())
+
+	data = cache.get(key)
+	if data is None:
+		data = build_dashboard(user.id, today)
+		cache.set(key, data)
+	return data
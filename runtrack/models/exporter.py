@@ -0,0 +1,87 @@
+"""Streams a user's full run history out of the database as CSV or JSON lines.
+
+Rows are read with yield_per, which uses a server-side cursor on PostgreSQL, and
+written out a chunk at a time, so an export never holds the whole history in memory.
+
+The CSV format has the same type, date and distance columns that the importer reads,
+so an exported file can be imported again.
+"""
+
+import csv
+import json
+from io import StringIO
+from typing import Iterator, Tuple
+
+from runtrack.models import db
+from runtrack.models.tables import Run, Goal
+
+FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+FIELDS = ["type", "date", "distance"]
+
+
+def history(user_id: int, batch_size: int = 1000) -> Iterator[Tuple[str, object, float]]:
+	"""lazily reads all of a user's runs and then all of their goals, each in date order
+
+	:param user_id: id of the user
+	:param batch_size: rows fetched from the cursor at a time
+	:return: iterator of (type, date, distance) tuples
+	"""
+
+	for kind, model in (("run", Run), ("goal", Goal)):
+		rows = db.session.query(model.date, model.distance) \
+			.filter(model.user_id == user_id) \
+			.order_by(model.date, model.id) \
+			.yield_per(batch_size)
+		for day, distance in rows:
+			yield kind, day, distance
+
+
+def _csv_lines(rows) -> Iterator[str]:
+	"""formats rows as CSV lines, header first"""
+
+	buffer = StringIO()
+	writer = csv.writer(buffer, lineterminator="\n")
+
+	def line(values) -> str:
+		writer.writerow(values)
+		text = buffer.getvalue()
+		buffer.seek(0)
+		buffer.truncate()
+		return text
+
+	yield line(FIELDS)
+	for kind, day, distance in rows:
+		yield line((kind, day.isoformat(), distance))
+
+
+def _jsonl_lines(rows) -> Iterator[str]:
+	"""formats rows as JSON lines"""
+
+	for kind, day, distance in rows:
+		yield json.dumps({"type": kind, "date": day.isoformat(), "distance": distance}) + "\n"
+
+
+def export(user_id: int, file_format: str, batch_size: int = 1000) -> Iterator[str]:
+	"""streams a user's history as text chunks of about batch_size rows each
+
+	:param user_id: id of the user
+	:param file_format: "csv" or "jsonl"
+	:param batch_size: rows per chunk (and per cursor fetch)
+	:return: iterator of text chunks
+	"""
+
+	if file_format == "csv":
+		lines = _csv_lines(history(user_id, batch_size))
+	elif file_format == "jsonl":
+		lines = _jsonl_lines(history(user_id, batch_size))
+	else:
+		raise ValueError("Unknown export format: {}".format(file_format))
+
+	chunk = []
+	for line in lines:
+		chunk.append(line)
+		if len(chunk) >= batch_size:
+			yield "".join(chunk)
+			chunk = []
+	if chunk:
+		yield "".join(chunk)
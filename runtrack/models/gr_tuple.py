@@ -1,6 +1,6 @@
 """Contains GoalRuns class"""
 
-from runtrack.models.tables import Goal
+from runtrack.models.records import GoalRecord
 from runtrack.models.runs import Runs
 import datetime
 
@@ -8,14 +8,17 @@ import datetime
 class GRTuple:
 	"""Combines a Goal and a Runs into an effective 2-tuple."""
 
-	def __init__(self, goal: Goal = Goal(distance=0), runs: Runs = Runs(), date: datetime.date = None) -> None:
+	def __init__(self, goal: GoalRecord = GoalRecord(), runs: Runs = None, date: datetime.date = None) -> None:
 		"""
 		initialize the object. We assume that the goal and the main are all on the same day.
 		:param goal: the goal to be stored
-		:param runs: the main to be stored
+		:param runs: the main to be stored (defaults to a new, empty Runs)
 		:param date: the date associated with the goals and main (defaults to None)
 		"""
 
+		if runs is None:
+			runs = Runs()
+
 		# ensure goal, main, and date all refer to same date
 		if date:
 			if (goal.date and goal.date != date) or (runs.one_day() and not runs.empty() and runs.first().date != date):
@@ -50,7 +53,7 @@ class GRTuple:
 	def diff(self) -> float:
 		"""gets the difference between total run distance and goal"""
 
-		return self.runs.sum() - float(self.goal.distance)
+		return self.runs.sum() - self.goal.distance
 
 	def sum(self) -> float:
 		"""gets the sum of all run distances"""
@@ -2,9 +2,11 @@
 
 from datetime import date, timedelta
 import calendar
-from copy import copy
+from bisect import bisect_left
 from functools import reduce
-from runtrack.models.tables import Run, Goal
+from itertools import groupby
+from operator import attrgetter
+from runtrack.models.records import RunRecord
 from runtrack.models.runs import Runs
 from runtrack.models.gr_tuple import GRTuple
 
@@ -19,9 +21,8 @@ class GroupGoalRuns:
 		kw args:
 			goals -- a list of Goal objects
 		"""
-		sorted_goals = copy(goals)
-		sorted_goals.sort(key=lambda goal: goal.date)
-		return sorted_goals
+		# a plain list, even when goals is an ORM relationship collection
+		return sorted(goals, key=lambda goal: goal.date)
 
 	@staticmethod
 	def __combine_goals_runs(goals, runs):
@@ -30,34 +31,9 @@ class GroupGoalRuns:
 		kw args:
 			goals -- a list of Goal objects
 
-			main -- a list of Run objects
+			main -- a Runs object
 		"""
-		# copy inputs
-		goals_copy = GroupGoalRuns.__sort_goals(goals)
-		runs_copy = copy(runs)
-		runs_daily = Runs(runs_copy).daily()
-
-		# implement a variation of Merge algorithm
-		combined = []
-		goals_copy.append(Goal(date=date.max))
-		runs_daily.append(Runs([Run(date=date.max)]))
-
-		i = 0
-		j = 0
-		while goals_copy[i].date != date.max or runs_daily[j].date != date.max:
-			if goals_copy[i].date == runs_daily[j].date:
-				combined.append(GRTuple(goal=goals_copy[i], runs=runs_daily[j]))
-				i, j = i + 1, j + 1
-
-			elif goals_copy[i].date < runs_daily[j].date:
-				combined.append(GRTuple(goal=goals_copy[i]))
-				i += 1
-
-			else:
-				combined.append(GRTuple(runs=runs_daily[j]))
-				j += 1
-
-		return combined
+		return list(iter_goal_runs(GroupGoalRuns.__sort_goals(goals), runs._runs))
 
 	def __init__(self, goals=None, runs=None):
 		"""initializes GroupGoalRuns object (a list of GoalRuns objects)
@@ -75,7 +51,7 @@ class GroupGoalRuns:
 
 		# grouped goal main
 		if len(goals) or len(runs):
-			self._ggr = GroupGoalRuns.__combine_goals_runs(goals, runs)
+			self._ggr = GroupGoalRuns.__combine_goals_runs(goals, Runs(runs))
 		else:
 			self._ggr = []
 
@@ -120,7 +96,7 @@ class GroupGoalRuns:
 		kw args:
 			self -- GroupGoalRuns object
 		"""
-		return reduce(lambda total, goalruns: total + float(goalruns.goal.distance), self._ggr, 0)
+		return reduce(lambda total, goalruns: total + goalruns.goal.distance, self._ggr, 0)
 
 	def sum_runs(self):
 		"""computes total run distances
@@ -177,19 +153,113 @@ class GroupGoalRunsWeekly(GroupGoalRuns):
 
 		GroupGoalRuns.__init__(self, goals, runs)
 		self._wggr = self._ggr
+		self._stats = None
 		self.monday = monday
 		self.sunday = monday + timedelta(days=6)
 
+		if any(not self.monday <= goalruns.date <= self.sunday for goalruns in self._wggr):
+			raise ValueError("Goals and main should be in the week")
+
+	@classmethod
+	def _from_goal_runs(cls, monday, goal_runs):
+		"""builds a week from GRTuples that are already merged and sorted by date
+
+		kw args:
+			monday -- first day of the week
+
+			goal_runs -- list of GRTuple objects that fall in the week, which add_run
+		copies before changing, so they can be shared with a GroupGoalRuns
+		"""
+		week = cls.__new__(cls)
+		week._ggr = goal_runs
+		week._wggr = goal_runs
+		week._stats = None
+		week.monday = monday
+		week.sunday = monday + timedelta(days=6)
+		return week
+
+	def _statistics(self):
+		"""computes (once) the week's statistics in a single pass over its main
+
+		kw args:
+			self -- GroupGoalRunsWeekly object
+		"""
+		if self._stats is None:
+			sum_goals, sum_runs, num_runs, longest = 0, 0.0, 0, None
+			daily = [0.0] * 7
+			for goalruns in self._wggr:
+				sum_goals += goalruns.goal.distance
+				for run in goalruns.runs._runs:
+					sum_runs += run.distance
+					num_runs += 1
+					daily[(run.date - self.monday).days] += run.distance
+					if longest is None or run.distance > longest.distance:
+						longest = run
+
+			self._stats = {
+				"sum_goals": sum_goals,
+				"sum_runs": sum_runs,
+				"num_runs": num_runs,
+				"longest_run": longest if longest is not None else RunRecord(),
+				"average_run": sum_runs / num_runs if num_runs else 0,
+				"daily_distances": daily,
+			}
+		return self._stats
+
+	def add_run(self, run):
+		"""adds a Run object to the week and clears the cached statistics
+
+		kw args:
+			self -- GroupGoalRunsWeekly object
+
+			run -- Run object dated in the week
+		"""
+		if not self.monday <= run.date <= self.sunday:
+			raise ValueError("Run should be in the week")
+
+		dates = [goalruns.date for goalruns in self._wggr]
+		index = bisect_left(dates, run.date)
+		if index < len(dates) and dates[index] == run.date:
+			# copy the day, whose GRTuple may also belong to the GroupGoalRuns the week came from
+			day = self._wggr[index]
+			self._wggr[index] = GRTuple(goal=day.goal, runs=Runs._from_sorted(list(day.runs._runs)), date=day.date)
+			self._wggr[index].add_run(run)
+		else:
+			self._wggr.insert(index, GRTuple(runs=Runs([run])))
+
+		self._stats = None
+
+	def sum_goals(self):
+		"""computes total goal distances
+
+		kw args:
+			self -- GroupGoalRunsWeekly object
+		"""
+		return self._statistics()["sum_goals"]
+
+	def sum_runs(self):
+		"""computes total run distances
+
+		kw args:
+			self -- GroupGoalRunsWeekly object
+		"""
+		return self._statistics()["sum_runs"]
+
+	def num_runs(self):
+		"""computes total number of main
+
+		kw args:
+			self -- GroupGoalRunsWeekly object
+		"""
+		return self._statistics()["num_runs"]
+
 	def longest_run(self):
-		"""returns Run object of longest run
+		"""returns Run object of longest run (with distance 0 if there are no main)
 
 		kw args:
 			self -- GroupGoalRunsWeekly object
 		"""
-		runs = Runs()
-		for goalruns in self._wggr:
-			runs.extend(goalruns.runs)
-		return runs.longest_run()
+		return self._statistics()["longest_run"]
 
 	def compare_distance(self, wggr):
 		"""returns the difference and percent increase in distances between two wggr objects
@@ -199,8 +269,9 @@ class GroupGoalRunsWeekly(GroupGoalRuns):
 
 			wggr -- a GroupGoalRunsWeekly object
 		"""
-		diff = self.sum_runs() - wggr.sum_runs()
-		return diff, (diff * 100) / wggr.sum_runs()
+		previous = wggr.sum_runs()
+		diff = self.sum_runs() - previous
+		return diff, 0 if not previous else (diff * 100) / previous
 
 	def compare_longest_run(self, wggr):
 		"""
@@ -212,8 +283,9 @@ class GroupGoalRunsWeekly(GroupGoalRuns):
 
 			wggr -- a GroupGoalRunsWeekly object
 		"""
-		diff = self.longest_run() - wggr.longest_run()
-		perc = 0 if not wggr.longest_run() else diff / wggr.longest_run()
+		previous = wggr.longest_run().distance
+		diff = self.longest_run().distance - previous
+		perc = 0 if not previous else diff / previous
 		return diff, perc
 
 	def daily_distances(self):
@@ -221,10 +293,7 @@ class GroupGoalRunsWeekly(GroupGoalRuns):
 
 		self -- GroupGoalRunsWeekly object
 		"""
-		runs = Runs()
-		for gr in self._wggr:
-			runs.extend(gr.runs)
-		return runs.daily_distances_between(self.monday, self.monday + timedelta(days=6))
+		return list(self._statistics()["daily_distances"])
 
 	def name(self):
 		"""names a week
@@ -232,14 +301,7 @@ class GroupGoalRunsWeekly(GroupGoalRuns):
 		kw args:
 			self -- GroupGoalRunsWeekly object
 		"""
-		monday = self.monday
-		sunday = monday + timedelta(days=6)
-		monday_str = calendar.month_abbr[monday.month] + " " + str(monday.day)
-		if monday.month == sunday.month:
-			return monday_str + " - " + str(sunday.day)
-		else:
-			sunday_str = calendar.month_abbr[sunday.month] + " " + str(sunday.day)
-			return monday_str + " - " + sunday_str
+		return week_name(self.monday)
 
 	def average_run(self):
 		"""computes length of average run
@@ -247,90 +309,191 @@ class GroupGoalRunsWeekly(GroupGoalRuns):
 		kw args:
 			self -- wggr object
 		"""
-		runs = Runs()
-		for goalruns in self._wggr:
-			runs.extend(goalruns.runs)
-		return runs.average()
+		return self._statistics()["average_run"]
 
 
 # Define methods for GroupGoalRuns
 
-def add_dummy_weeks(combined):
+def week_of(day):
+	"""gets the Monday of the week that contains day
+
+	kw args:
+		day -- date object
+	"""
+	return day - timedelta(days=day.weekday())
+
+
+def fill_weekly_totals(totals, at_least=0):
+	"""adds zero totals for skipped weeks, like weekly(dummy=True, at_least=at_least)
+
+	kw args:
+		totals -- list of (monday, total) tuples in date order, for weeks with goals or main
+
+		at_least -- minimum length of output
+	"""
+	current_monday = week_of(date.today())
+	filled = []
+	next_monday = totals[0][0] if totals else current_monday + timedelta(days=7)
+
+	for monday, total in totals:
+		while next_monday < monday and next_monday <= current_monday:
+			filled.append((next_monday, 0))
+			next_monday += timedelta(days=7)
+		filled.append((monday, total))
+		next_monday = monday + timedelta(days=7)
+
+	while next_monday <= current_monday:
+		filled.append((next_monday, 0))
+		next_monday += timedelta(days=7)
+
+	first_monday = filled[0][0] if filled else current_monday + timedelta(days=7)
+	missing = at_least - len(filled)
+	return [(first_monday - timedelta(days=7 * k), 0) for k in range(missing, 0, -1)] + filled
+
+
+def week_name(monday):
+	"""names the week that starts on monday, e.g. "Aug 13 - 19"
+
+	kw args:
+		monday -- date object
+	"""
+	sunday = monday + timedelta(days=6)
+	monday_str = calendar.month_abbr[monday.month] + " " + str(monday.day)
+	if monday.month == sunday.month:
+		return monday_str + " - " + str(sunday.day)
+	else:
+		sunday_str = calendar.month_abbr[sunday.month] + " " + str(sunday.day)
+		return monday_str + " - " + sunday_str
+
+
+def add_dummy_weeks(combined, end_date):
 	"""adds empty lists if weeks are skipped in weekly function
 
 	kw args:
 		combined -- list of GroupGoalRunsWeekly object
+
+		end_date -- date object, empty weeks are added up to the week containing it
 	"""
 	current_date = combined[0].monday
-	end_date = date.today()
+	filled = []
+
+	for week in combined:
+		while current_date < week.monday and current_date <= end_date:
+			filled.append(GroupGoalRunsWeekly(monday=current_date))
+			current_date += timedelta(days=7)
+		filled.append(week)
+		current_date = week.monday + timedelta(days=7)
 
-	i = 0
 	while current_date <= end_date:
-		if i >= len(combined) or combined[i].monday > current_date:
-			combined = combined[:i] + [GroupGoalRunsWeekly(monday=current_date)] + combined[i:]
-		else:
-			i += 1
+		filled.append(GroupGoalRunsWeekly(monday=current_date))
 		current_date += timedelta(days=7)
 
-	return combined
+	return filled
 
 
-def weekly(self, dummy=False, at_least=0):
-	"""combines GroupGoalRuns object by week
+def iter_goal_runs(goals, runs):
+	"""lazily merges goals and main into GRTuples, one per day (or per extra goal on a day)
+
+	Both inputs are consumed one item at a time, so they can be generators, e.g.
+	ordered queries, and a consumer that stops early never reads the rest.
 
 	kw args:
-		self -- GroupGoalRuns object
+		goals -- iterable of goals in date order
 
-		dummy -- includes weeks with no main if True
+		main -- iterable of main in date order
+	"""
+	goals = _in_date_order(goals)
+	daily_runs = ((day, Runs._from_sorted(list(day_runs)))
+				  for day, day_runs in groupby(_in_date_order(runs), key=attrgetter("date")))
 
-		at_least -- minimum length of output
+	goal, day = next(goals, None), next(daily_runs, None)
+	while goal is not None or day is not None:
+		if day is None or (goal is not None and goal.date < day[0]):
+			yield GRTuple(goal=goal)
+			goal = next(goals, None)
+
+		elif goal is None or day[0] < goal.date:
+			yield GRTuple(runs=day[1])
+			day = next(daily_runs, None)
+
+		else:
+			yield GRTuple(goal=goal, runs=day[1])
+			goal, day = next(goals, None), next(daily_runs, None)
+
+
+def _in_date_order(items):
+	"""passes items through, raising ValueError if their dates go backwards
+
+	kw args:
+		items -- iterable of goals or main
 	"""
-	combined = []
+	previous = None
+	for item in items:
+		if previous is not None and item.date < previous:
+			raise ValueError("Goals and main must be in date order")
+		previous = item.date
+		yield item
 
-	if len(self):
-		# initialize values
-		monday = self.first_monday()
-		sunday = monday + timedelta(days=6)
-		goals, runs = [], []
 
-		# combine the objects by week
-		for goalruns in self._ggr:
-			if goalruns.date <= sunday:
-				if float(goalruns.goal.distance) > 0:
-					goals.append(goalruns.goal)
-				runs.extend(goalruns.runs._runs)
+def iter_weekly(goal_runs):
+	"""lazily groups GRTuples in date order into weeks, like weekly() without dummy weeks
 
-			elif goalruns.date > sunday:
-				# Clean up
-				combined.append(GroupGoalRunsWeekly(goals=goals, runs=runs, monday=monday))
-				monday, sunday = monday + timedelta(days=7), sunday + timedelta(days=7)
-				runs, goals = [], []
+	Each week is yielded as soon as the first GRTuple of a later week is read.
 
-				if float(goalruns.goal.distance) > 0:
-					goals.append(goalruns.goal)
-				runs.extend(goalruns.runs._runs)
+	kw args:
+		goal_runs -- iterable of GRTuple objects in date order
+	"""
+	monday, bucket = None, []
+	for goalruns in goal_runs:
+		if not len(goalruns.runs) and goalruns.goal.distance <= 0:
+			continue
 
-		# add last week
-		if goals or runs:
-			combined.append(GroupGoalRunsWeekly(goals=goals, runs=runs, monday=monday))
+		goal_runs_monday = week_of(goalruns.date)
+		if goal_runs_monday != monday:
+			if bucket:
+				yield GroupGoalRunsWeekly._from_goal_runs(monday, bucket)
+			monday, bucket = goal_runs_monday, []
+		bucket.append(goalruns)
 
-		if dummy:
-			combined = GroupGoalRuns.__add_dummy_weeks(combined)
+	if bucket:
+		yield GroupGoalRunsWeekly._from_goal_runs(monday, bucket)
 
-		while len(combined) < at_least:
-			combined = [GroupGoalRunsWeekly(monday=combined[0].monday - timedelta(days=7))] + combined
 
-		return combined
+def weekly(self, dummy=False, at_least=0, until=None):
+	"""combines GroupGoalRuns object by week
 
-	else:
-		today = date.today()
-		start_date = today - timedelta(days=today.weekday())
+	kw args:
+		self -- GroupGoalRuns object
 
-		while len(combined) < at_least:
-			combined = [GroupGoalRunsWeekly(monday=start_date)] + combined
-			start_date -= timedelta(days=7)
+		dummy -- includes weeks with no main if True
+
+		at_least -- minimum length of output
 
-		return combined
+		until -- date object that empty weeks are added up to, defaults to today
+	"""
+	if until is None:
+		until = date.today()
+	combined = []
+
+	if len(self):
+		# bucket the (sorted) GoalRuns by week in a single pass
+		combined = list(iter_weekly(self._ggr))
+
+		if dummy and combined:
+			combined = GroupGoalRuns.__add_dummy_weeks(combined, until)
+
+	# pad the front with empty weeks, ending the week before the earliest one
+	if len(combined) < at_least:
+		if combined:
+			last_monday = combined[0].monday - timedelta(days=7)
+		else:
+			last_monday = week_of(until)
+
+		missing = at_least - len(combined)
+		combined = [GroupGoalRunsWeekly(monday=last_monday - timedelta(days=7 * k))
+					for k in range(missing - 1, -1, -1)] + combined
+
+	return combined
 
 
 def weekly_distances(combined):
@@ -0,0 +1,112 @@
+"""Loads the logged-in user from a small identity cache instead of the database.
+
+The login manager needs a user object on every authenticated request, but most
+routes only use its id. load_user returns a CurrentUser built from a cached
+(id, name, email) tuple; the ORM User is only loaded if a route reads anything else.
+
+The cache is per worker process, size-bounded and short-lived. A worker forgets a
+user when they log out or their User row changes; other workers catch up within
+IDENTITY_CACHE_TIMEOUT seconds.
+"""
+
+from flask import current_app, has_app_context
+from flask_login import UserMixin
+from sqlalchemy import event
+
+from runtrack.cache import LRUCache
+from runtrack.models import db, login
+from runtrack.models.tables import User
+
+
+class CurrentUser(UserMixin):
+	"""lightweight stand-in for the logged-in User
+
+	id, name and email come from the identity cache, and data_version is read on its
+	own. Any other attribute (e.g. runs or goals) loads the ORM User, once per request.
+	"""
+
+	def __init__(self, id: int, name: str, email: str) -> None:
+		self.id = id
+		self.name = name
+		self.email = email
+		self._data_version = None
+		self._user = None
+
+	def __repr__(self):
+		return "<CurrentUser {}>".format(self.name)
+
+	@property
+	def data_version(self) -> int:
+		"""the user's data version, read without loading the User"""
+
+		if self._user is not None:
+			return self._user.data_version
+		if self._data_version is None:
+			self._data_version = db.session.query(User.data_version).filter(User.id == self.id).scalar()
+		return self._data_version
+
+	def orm_user(self) -> User:
+		"""the User row of this user, loaded on first use"""
+
+		if self._user is None:
+			self._user = User.query.get(self.id)
+		return self._user
+
+	def __getattr__(self, name):
+		# only called for attributes the stand-in does not have
+		if name.startswith("_"):
+			raise AttributeError(name)
+		return getattr(self.orm_user(), name)
+
+
+def init_app(app) -> None:
+	"""creates the app's identity cache
+
+	:param app: flask app
+	"""
+
+	app.config.setdefault("IDENTITY_CACHE_TIMEOUT", 60)
+	app.config.setdefault("IDENTITY_CACHE_SIZE", 1000)
+	app.extensions["identity_cache"] = LRUCache(app.config["IDENTITY_CACHE_SIZE"],
+												app.config["IDENTITY_CACHE_TIMEOUT"])
+
+
+def _identities() -> LRUCache:
+	return current_app.extensions["identity_cache"]
+
+
+def remember(user: User) -> None:
+	"""caches a user's identity, e.g. when they log in
+
+	:param user: User object
+	"""
+
+	_identities().set(str(user.id), (user.id, user.name, user.email))
+
+
+def forget(user_id: int) -> None:
+	"""drops a user's cached identity, e.g. when they log out or their account changes
+
+	:param user_id: id of the user
+	"""
+
+	if has_app_context() and "identity_cache" in current_app.extensions:
+		_identities().delete(str(user_id))
+
+
+@login.user_loader
+def load_user(user_id):
+	identity = _identities().get(str(user_id))
+	if identity is None:
+		identity = db.session.query(User.id, User.name, User.email).filter(User.id == int(user_id)).first()
+		if identity is None:
+			return None
+		identity = tuple(identity)
+		_identities().set(str(user_id), identity)
+	return CurrentUser(*identity)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _forget_changed_user(mapper, connection, user):
+	forget(user.id)
@@ -0,0 +1,260 @@
+"""Streams run histories from CSV and GPX files into the database.
+
+Files are parsed one row (or one GPX track point) at a time and written in batched,
+multi-row INSERT statements, all inside the caller's transaction.
+
+CSV files need a header with date (YYYY-MM-DD) and distance (miles) columns, and may
+have a type column that is either "run" (the default) or "goal". Each GPX track
+becomes one run, dated by its first timestamp.
+"""
+
+import csv
+import math
+from collections import namedtuple
+from datetime import datetime, date
+from itertools import islice
+from typing import Iterable, Iterator, List
+from xml.etree.ElementTree import iterparse, ParseError
+
+from runtrack.models import db
+from runtrack.models.tables import Run, Goal
+from runtrack.models import weekly_summary, dashboard
+from runtrack.models.group_goal_runs import week_of
+
+# one validated row of an import file
+ImportRow = namedtuple("ImportRow", ["kind", "date", "distance"])
+
+EARTH_RADIUS_MILES = 3958.8
+MAX_ERRORS = 20
+
+
+class ImportResult:
+	"""counts of what an import added, and the rows it rejected"""
+
+	def __init__(self) -> None:
+		self.runs = 0
+		self.goals = 0
+		self.errors = []
+
+	def error(self, where: str, message: str) -> None:
+		"""records a rejected row
+
+		:param where: where the row is in the file, e.g. "line 3"
+		:param message: why the row was rejected
+		"""
+
+		if len(self.errors) < MAX_ERRORS:
+			self.errors.append("{}: {}".format(where, message))
+		elif len(self.errors) == MAX_ERRORS:
+			self.errors.append("too many errors, stopped reporting")
+
+
+def parse_row(kind: str, day: str, distance: str) -> ImportRow:
+	"""validates one row of an import file
+
+	:param kind: "run" or "goal" (empty means run)
+	:param day: date as YYYY-MM-DD
+	:param distance: non-negative number of miles
+	:return: validated ImportRow
+	"""
+
+	kind = (kind or "run").strip().lower()
+	if kind not in ("run", "goal"):
+		raise ValueError("type must be run or goal, not {!r}".format(kind))
+
+	try:
+		day = datetime.strptime((day or "").strip(), "%Y-%m-%d").date()
+	except ValueError:
+		raise ValueError("date must be YYYY-MM-DD, not {!r}".format(day))
+
+	try:
+		distance = float(distance)
+	except (TypeError, ValueError):
+		raise ValueError("distance must be a number, not {!r}".format(distance))
+	if not 0 <= distance < math.inf:
+		raise ValueError("distance must be a non-negative number")
+
+	return ImportRow(kind, day, distance)
+
+
+def read_csv(stream: Iterable[str], result: ImportResult) -> Iterator[ImportRow]:
+	"""lazily parses a CSV file, recording invalid rows in result
+
+	:param stream: text stream (or other iterable of lines)
+	:param result: ImportResult that collects errors
+	:return: iterator of valid rows
+	"""
+
+	reader = csv.DictReader(stream)
+	if reader.fieldnames is None or not {"date", "distance"} <= set(reader.fieldnames):
+		result.error("line 1", "header must include date and distance columns")
+		return
+
+	for row in reader:
+		try:
+			yield parse_row(row.get("type"), row["date"], row["distance"])
+		except ValueError as error:
+			result.error("line {}".format(reader.line_num), str(error))
+
+
+def _local_name(tag: str) -> str:
+	"""strips the XML namespace from a tag"""
+
+	return tag.rsplit("}", 1)[-1]
+
+
+def _haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+	"""distance in miles between two points on the earth"""
+
+	phi1, phi2 = math.radians(lat1), math.radians(lat2)
+	d_phi, d_lambda = phi2 - phi1, math.radians(lon2 - lon1)
+	a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+	return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+
+
+def read_gpx(stream, result: ImportResult) -> Iterator[ImportRow]:
+	"""lazily parses a GPX file into one run per track, recording bad tracks in result
+
+	Track points are discarded as soon as they are measured, so memory use does not
+	grow with the size of the file.
+
+	:param stream: binary stream
+	:param result: ImportResult that collects errors
+	:return: iterator of valid rows
+	"""
+
+	track_number, miles, previous, day = 0, 0.0, None, None
+	try:
+		for event, element in iterparse(stream, events=("end",)):
+			name = _local_name(element.tag)
+
+			if name == "trkpt":
+				try:
+					point = float(element.get("lat")), float(element.get("lon"))
+				except (TypeError, ValueError):
+					point = None
+				if point is not None:
+					if previous is not None:
+						miles += _haversine(previous[0], previous[1], point[0], point[1])
+					previous = point
+				if day is None:
+					for child in element:
+						if _local_name(child.tag) == "time" and child.text:
+							day = child.text.strip()[:10]
+				element.clear()
+
+			elif name == "trkseg":
+				# segments are separate pieces of a track; do not join their ends
+				previous = None
+				element.clear()
+
+			elif name == "trk":
+				track_number += 1
+				try:
+					yield parse_row("run", day, round(miles, 2))
+				except ValueError as error:
+					result.error("track {}".format(track_number), str(error))
+				miles, previous, day = 0.0, None, None
+				element.clear()
+	except ParseError as error:
+		result.error("line {}".format(error.position[0]), "invalid GPX: {}".format(error))
+
+
+def _batches(rows: Iterator[ImportRow], size: int) -> Iterator[List[ImportRow]]:
+	"""splits rows into lists of at most size rows"""
+
+	while True:
+		batch = list(islice(rows, size))
+		if not batch:
+			return
+		yield batch
+
+
+def import_rows(user_id: int, rows: Iterator[ImportRow], result: ImportResult, batch_size: int = 1000) -> None:
+	"""writes rows for a user in batches. The caller commits (or rolls back) the session.
+
+	Runs are added with multi-row INSERTs. Goals are upserted: a goal for a date that
+	already has one replaces its distance. The weekly summaries are updated from the
+	same batches, and the user's data version is bumped.
+
+	:param user_id: id of the user
+	:param rows: iterator of validated rows
+	:param result: ImportResult that counts what was written
+	:param batch_size: rows per INSERT statement
+	"""
+
+	weeks = {}
+
+	def week(day: date) -> dict:
+		return weeks.setdefault(week_of(day), {"distance": 0.0, "goal": 0.0, "runs": 0, "longest": 0.0})
+
+	for batch in _batches(rows, batch_size):
+		runs = [{"user_id": user_id, "date": row.date, "distance": row.distance}
+				for row in batch if row.kind == "run"]
+		if runs:
+			db.session.execute(Run.__table__.insert().values(runs))
+			result.runs += len(runs)
+			for run in runs:
+				totals = week(run["date"])
+				totals["distance"] += run["distance"]
+				totals["runs"] += 1
+				totals["longest"] = max(totals["longest"], run["distance"])
+
+		# the last goal for a date wins, in the file and against the database
+		goals = dict((row.date, row.distance) for row in batch if row.kind == "goal")
+		if goals:
+			existing = Goal.query.filter(Goal.user_id == user_id, Goal.date.in_(list(goals))).all()
+			for goal in existing:
+				week(goal.date)["goal"] += goals[goal.date] - goal.distance
+				goal.distance = goals[goal.date]
+			for goal in existing:
+				goals.pop(goal.date, None)
+
+			if goals:
+				db.session.execute(Goal.__table__.insert().values(
+					[{"user_id": user_id, "date": day, "distance": distance} for day, distance in goals.items()]))
+				for day, distance in goals.items():
+					week(day)["goal"] += distance
+			result.goals += len(existing) + len(goals)
+
+	for monday, totals in weeks.items():
+		weekly_summary.add_to_week(user_id, monday, totals["distance"], totals["goal"], totals["runs"],
+								   totals["longest"])
+
+	if weeks:
+		dashboard.bump_data_version(user_id)
+
+
+def import_file(user_id: int, stream, file_format: str, batch_size: int = 1000) -> ImportResult:
+	"""imports a CSV or GPX file for a user in a single transaction
+
+	Nothing is written unless every row is valid.
+
+	:param user_id: id of the user
+	:param stream: binary stream of the file
+	:param file_format: "csv" or "gpx"
+	:param batch_size: rows per INSERT statement
+	:return: ImportResult with counts, or the errors if nothing was written
+	"""
+
+	result = ImportResult()
+	if file_format == "csv":
+		text = (line.decode("utf-8-sig") for line in stream)
+		rows = read_csv(text, result)
+	elif file_format == "gpx":
+		rows = read_gpx(stream, result)
+	else:
+		raise ValueError("Unknown import format: {}".format(file_format))
+
+	try:
+		import_rows(user_id, rows, result, batch_size)
+	except Exception:
+		db.session.rollback()
+		raise
+
+	if result.errors:
+		db.session.rollback()
+		result.runs, result.goals = 0, 0
+	else:
+		db.session.commit()
+	return result
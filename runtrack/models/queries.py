@@ -0,0 +1,194 @@
+"""Aggregate queries that compute run totals in the database.
+
+Runs and GroupGoalRuns remain the reference implementation; these queries return
+the same numbers while only the aggregated rows cross the wire.
+"""
+
+from datetime import date
+from typing import Iterator, List, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import Date
+
+from runtrack.models import db
+from runtrack.models.tables import Run, Goal
+from runtrack.models.records import RunRecord, GoalRecord
+from runtrack.models.group_goal_runs import fill_weekly_totals
+
+
+class week_start(FunctionElement):
+	"""SQL expression for the Monday of the week that contains a date column"""
+	type = Date()
+	name = "week_start"
+
+
+@compiles(week_start)
+def _week_start_default(element, compiler, **kw):
+	return "CAST(date_trunc('week', %s) AS DATE)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(week_start, "sqlite")
+def _week_start_sqlite(element, compiler, **kw):
+	return "date(%s, 'weekday 0', '-6 days')" % compiler.process(element.clauses, **kw)
+
+
+class greatest(FunctionElement):
+	"""SQL expression for the larger of two values"""
+	name = "greatest"
+
+
+@compiles(greatest)
+def _greatest_default(element, compiler, **kw):
+	return "GREATEST(%s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(greatest, "sqlite")
+def _greatest_sqlite(element, compiler, **kw):
+	return "max(%s)" % compiler.process(element.clauses, **kw)
+
+
+def _distance_total(column):
+	"""SQL expression for the total of a distance column"""
+	return func.coalesce(func.sum(column), 0)
+
+
+def load_window(user_id: int, start_date: date = None,
+				end_date: date = None) -> Tuple[List[GoalRecord], List[RunRecord]]:
+	"""loads a user's goals and runs dated in [start_date, end_date], ordered by date
+
+	Both queries are served by the (user_id, date) indexes, and the results come back
+	already sorted, so Runs and GroupGoalRuns do not need to re-sort them. Only the
+	date and distance columns are selected, into records rather than ORM objects.
+
+	:param user_id: id of the user
+	:param start_date: first day, or None for no lower bound
+	:param end_date: last day, or None for no upper bound
+	:return: tuple of (goals, runs) lists of records
+	"""
+
+	def windowed(model, record):
+		return [record(day, distance) for day, distance in _window_query(model, user_id, start_date, end_date)]
+
+	return windowed(Goal, GoalRecord), windowed(Run, RunRecord)
+
+
+def load_runs(user_id: int, start_date: date = None, end_date: date = None) -> List[RunRecord]:
+	"""loads only a user's runs dated in [start_date, end_date], like load_window
+
+	:param user_id: id of the user
+	:param start_date: first day, or None for no lower bound
+	:param end_date: last day, or None for no upper bound
+	:return: list of records ordered by date
+	"""
+
+	return [RunRecord(day, distance) for day, distance in _window_query(Run, user_id, start_date, end_date)]
+
+
+def stream_window(user_id: int, start_date: date = None, end_date: date = None,
+				  batch_size: int = 1000) -> Tuple[Iterator[GoalRecord], Iterator[RunRecord]]:
+	"""like load_window, but returns lazy iterators that read batch_size rows at a time
+
+	Each query only runs when its iterator is first read, and uses a server-side
+	cursor on PostgreSQL, so a consumer that stops early never fetches the rest.
+
+	:param user_id: id of the user
+	:param start_date: first day, or None for no lower bound
+	:param end_date: last day, or None for no upper bound
+	:param batch_size: rows fetched from each cursor at a time
+	:return: tuple of (goals, runs) iterators of records
+	"""
+
+	def streamed(model, record):
+		for day, distance in _window_query(model, user_id, start_date, end_date).yield_per(batch_size):
+			yield record(day, distance)
+
+	return streamed(Goal, GoalRecord), streamed(Run, RunRecord)
+
+
+def _window_query(model, user_id: int, start_date: date = None, end_date: date = None):
+	"""query for the (date, distance) of a user's goals or runs in a window, in date order"""
+	query = db.session.query(model.date, model.distance).filter(model.user_id == user_id)
+	if start_date is not None:
+		query = query.filter(model.date >= start_date)
+	if end_date is not None:
+		query = query.filter(model.date <= end_date)
+	return query.order_by(model.date, model.id)
+
+
+def daily_totals(user_id: int, start_date: date, end_date: date) -> List[Tuple[date, float]]:
+	"""gets the total distance run on each day with runs in [start_date, end_date]
+
+	:param user_id: id of the user
+	:param start_date: first day
+	:param end_date: last day
+	:return: list of (date, total distance) tuples in date order
+	"""
+
+	rows = db.session.query(Run.date, _distance_total(Run.distance)) \
+		.filter(Run.user_id == user_id, Run.date >= start_date, Run.date <= end_date) \
+		.group_by(Run.date) \
+		.order_by(Run.date) \
+		.all()
+	return rows
+
+
+def daily_distances_between(user_id: int, start_date: date, end_date: date) -> List[float]:
+	"""returns a list of distances run daily in specified interval, like Runs.daily_distances_between
+
+	:param user_id: id of the user
+	:param start_date: first day
+	:param end_date: last day
+	:return: list with the total distance of each day
+	"""
+
+	if start_date > end_date:
+		raise ValueError("Invalid interval")
+
+	totals = [0.0] * ((end_date - start_date).days + 1)
+	for day, total in daily_totals(user_id, start_date, end_date):
+		totals[(day - start_date).days] = total
+	return totals
+
+
+def weekly_totals(user_id: int) -> List[Tuple[date, float, float]]:
+	"""gets the run and goal totals of every week with runs or goals
+
+	:param user_id: id of the user
+	:return: list of (monday, total distance, total goal) tuples in date order
+	"""
+
+	run_week = week_start(Run.date).label("monday")
+	goal_week = week_start(Goal.date).label("monday")
+
+	run_rows = db.session.query(run_week, _distance_total(Run.distance)) \
+		.filter(Run.user_id == user_id) \
+		.group_by(run_week) \
+		.all()
+	goal_rows = db.session.query(goal_week, _distance_total(Goal.distance)) \
+		.filter(Goal.user_id == user_id) \
+		.group_by(goal_week) \
+		.all()
+
+	weeks = {}
+	for monday, total in run_rows:
+		weeks[monday] = (total, 0.0)
+	for monday, total in goal_rows:
+		weeks[monday] = (weeks.get(monday, (0.0, 0.0))[0], total)
+
+	return [(monday, runs_total, goals_total) for monday, (runs_total, goals_total) in sorted(weeks.items())]
+
+
+def weekly_distances(user_id: int, at_least: int = 0) -> List[Tuple[date, float]]:
+	"""gets weekly run totals with empty weeks filled in up to the current week,
+	like GroupGoalRuns.weekly(dummy=True, at_least=at_least) followed by weekly_distances
+
+	:param user_id: id of the user
+	:param at_least: minimum number of weeks returned
+	:return: list of (monday, total distance) tuples in date order
+	"""
+
+	weeks = weekly_totals(user_id)
+	return fill_weekly_totals([(monday, runs_total) for monday, runs_total, goals_total in weeks
+							   if runs_total or goals_total], at_least)
@@ -0,0 +1,24 @@
+"""Immutable run and goal records used by the analytics models.
+
+Runs, GRTuple and GroupGoalRuns only read a run's or goal's date and distance, so
+they work on these compact tuples instead of ORM objects. A record has no
+instrumented attributes, session or identity map entry. The models still accept
+Run and Goal objects, which have the same two attributes.
+"""
+
+from collections import namedtuple
+
+
+class RunRecord(namedtuple("RunRecord", ["date", "distance"])):
+	"""a run: its date and its distance in miles"""
+	__slots__ = ()
+
+
+class GoalRecord(namedtuple("GoalRecord", ["date", "distance"])):
+	"""a daily goal: its date and its distance in miles"""
+	__slots__ = ()
+
+
+# undated, zero-distance records stand in for a missing run or goal
+RunRecord.__new__.__defaults__ = (None, 0.0)
+GoalRecord.__new__.__defaults__ = (None, 0.0)
@@ -1,9 +1,8 @@
 """Contains Runs class"""
 
 import datetime
-from copy import copy
-from functools import reduce
-from runtrack.models.tables import Run
+from bisect import bisect_left, bisect_right
+from runtrack.models.records import RunRecord
 from typing import List
 
 
@@ -11,18 +10,61 @@ class Runs:
 	"""Combines main into a sorted list"""
 	
 	@staticmethod
-	def _sort_runs(runs: List[Run]) -> List[Run]:
+	def _sort_runs(runs: List[RunRecord]) -> List[RunRecord]:
 		"""sorts a list of Run objects in nondecreasing order by date
 
+		Input that is already sorted (e.g. from an ordered query) is only copied.
+
 		:param runs: list of main to be sorted by date
 		:return: sorted list of main
 		"""
 
-		sorted_runs = copy(runs)
-		sorted_runs.sort(key=lambda run: run.date)
+		sorted_runs = list(runs)
+		if any(sorted_runs[k].date > sorted_runs[k + 1].date for k in range(len(sorted_runs) - 1)):
+			sorted_runs.sort(key=lambda run: run.date)
 		return sorted_runs
 
-	def __init__(self, runs: List[Run] = None, date: datetime.date = None) -> None:
+	@staticmethod
+	def _merge(new_runs: List[RunRecord], runs: List[RunRecord]) -> List[RunRecord]:
+		"""merges two sorted lists of Run objects in O(n + m)
+
+		Runs from new_runs go before runs with the same date.
+
+		:param new_runs: sorted list of main to be merged in
+		:param runs: sorted list of existing main
+		:return: merged, sorted list of main
+		"""
+
+		merged = []
+		i, j = 0, 0
+		while i < len(new_runs) and j < len(runs):
+			if new_runs[i].date <= runs[j].date:
+				merged.append(new_runs[i])
+				i += 1
+			else:
+				merged.append(runs[j])
+				j += 1
+
+		merged.extend(new_runs[i:])
+		merged.extend(runs[j:])
+		return merged
+
+	@classmethod
+	def _from_sorted(cls, runs: List[RunRecord], dates: List[datetime.date] = None) -> "Runs":
+		"""builds a Runs object from a list that is already sorted by date
+
+		:param runs: sorted list of Run objects, owned by the new object
+		:param dates: the dates of runs, if already known
+		:return: new Runs object
+		"""
+
+		runs_instance = cls.__new__(cls)
+		runs_instance._runs = runs
+		runs_instance._dates = dates if dates is not None else [run.date for run in runs]
+		runs_instance.date = runs_instance._dates[0] if runs else None
+		return runs_instance
+
+	def __init__(self, runs: List[RunRecord] = None, date: datetime.date = None) -> None:
 		"""Combines main into a sorted list
 
 		:param runs: a list of Run objects, defaults to an empty list
@@ -33,6 +75,7 @@ class Runs:
 			runs = []
 
 		self._runs = Runs._sort_runs(runs)
+		self._dates = [run.date for run in self._runs]
 
 		if date:
 			self.date = date
@@ -65,7 +108,7 @@ class Runs:
 
 		return len(self._runs)
 
-	def __getitem__(self, key: int) -> Run:
+	def __getitem__(self, key: int) -> RunRecord:
 		"""returns item with associated self._runs index
 
 		:param key: int corresponding to self._runs index
@@ -74,39 +117,31 @@ class Runs:
 
 		return self._runs[key]
 
-	def add_all(self, runs: List[Run]) -> None:
+	def add_all(self, runs: List[RunRecord]) -> None:
 		"""Merges a Runs object and a list of Run objects into a single Runs object
 
 		:param runs: Runs object to be merged
 		"""
 
-		# Sort inputs in nondecreasing order
 		sorted_runs = Runs._sort_runs(runs)
-		_runs_copy = copy(self._runs)
-
-		# Increase length of self._runs
-		self._runs = sorted_runs + _runs_copy
-
-		# Implement Merge algorithm
-		sorted_runs.append(Run(date=datetime.date.max))
-		_runs_copy.append(Run(date=datetime.date.max))
-		i = 0
-		j = 0
-		for k in range(len(self._runs)):
-			if sorted_runs[i].date <= _runs_copy[j].date:
-				self._runs[k] = sorted_runs[i]
-				i += 1
-			else:
-				self._runs[k] = _runs_copy[j]
-				j += 1
+		if not sorted_runs:
+			return
 
-	def add(self, run: Run) -> None:
+		self._runs = Runs._merge(sorted_runs, self._runs)
+		self._dates = [run.date for run in self._runs]
+		self.date = self._dates[0]
+
+	def add(self, run: RunRecord) -> None:
 		"""Adds a Run object to a Runs object
 
 		:param run: Run to be added
 		"""
 
-		self.add_all([run])
+		# binary search keeps the new run before existing runs on the same date
+		index = bisect_left(self._dates, run.date)
+		self._runs.insert(index, run)
+		self._dates.insert(index, run.date)
+		self.date = self._dates[0]
 
 	def extend(self, runs_instance: "Runs") -> None:
 		"""Combines two Runs instances
@@ -128,17 +163,9 @@ class Runs:
 			raise ValueError("Invalid interval")
 
 		else:
-			if self._runs:
-				interval_runs = []
-				for run in self._runs:
-					if run.date > end_date:
-						break
-					elif run.date >= start_date:
-						interval_runs.append(run)
-				return Runs(interval_runs)
-
-			else:
-				return Runs()
+			start = bisect_left(self._dates, start_date)
+			end = bisect_right(self._dates, end_date)
+			return Runs._from_sorted(self._runs[start:end], self._dates[start:end])
 
 	def last(self):
 		"""Gets the most recent run
@@ -149,7 +176,7 @@ class Runs:
 		if not self.empty():
 			return self._runs[-1]
 		else:
-			return Run()
+			return RunRecord()
 
 	def first(self):
 		"""Gets the first recorded run
@@ -160,7 +187,7 @@ class Runs:
 		if not self.empty():
 			return self._runs[0]
 		else:
-			return Run()
+			return RunRecord()
 
 	def one_day(self):
 		"""Computes whether all Run objects have the same date
@@ -168,14 +195,8 @@ class Runs:
 		kw args:
 			self -- Runs object
 		"""
-		if not self.empty():
-			first_run = self.first()
-			for run in self._runs:
-				if run.date != first_run.date:
-					return False
-			return True
-		else:
-			return True
+		# main are sorted, so comparing the endpoints is enough
+		return self.empty() or self._dates[0] == self._dates[-1]
 
 	def daily(self):
 		"""combines Runs objects together based on day
@@ -183,20 +204,31 @@ class Runs:
 		kw args:
 			self -- Runs object
 		"""
-		if self.empty():
-			return []
-		elif self.one_day():
-			return [self]
-		else:
-			current_date = self.first().date
-			daily_runs = [Runs(date=current_date)]
-			for run in self._runs:
-				if run.date == current_date:
-					daily_runs[-1].add(run)
-				else:
-					daily_runs.append(Runs([run]))
-					current_date = run.date
-			return daily_runs
+		if self.one_day():
+			return [self] if not self.empty() else []
+
+		# slice the sorted list at each change of date in a single pass
+		daily_runs = []
+		start = 0
+		for end in range(1, len(self._dates) + 1):
+			if end == len(self._dates) or self._dates[end] != self._dates[start]:
+				daily_runs.append(Runs._from_sorted(self._runs[start:end], self._dates[start:end]))
+				start = end
+		return daily_runs
+
+	def sum_between(self, start_date: datetime.date, end_date: datetime.date) -> float:
+		"""Sums the distances of main in [start_date, end_date], found by binary search
+
+		:param start_date: first date in interval
+		:param end_date: last date in interval
+		:return: total distance run in the interval
+		"""
+
+		if start_date > end_date:
+			raise ValueError("Invalid interval")
+
+		start, end = bisect_left(self._dates, start_date), bisect_right(self._dates, end_date)
+		return sum((run.distance for run in self._runs[start:end]), 0.0)
 
 	def daily_distances_between(self, start_date, end_date):
 		"""returns a list of distances run daily in specified interval
@@ -206,20 +238,14 @@ class Runs:
 
 			end_date -- Date object
 		"""
-		daily_runs = self.interval(start_date, end_date).daily()
-		totals = []
-		current_date = start_date
-		i = 0
-
-		while current_date <= end_date:
-			if i < len(daily_runs) and daily_runs[i].date == current_date:
-				totals.append(daily_runs[i].sum())
-				i += 1
-
-			else:
-				totals.append(0)
+		if start_date > end_date:
+			raise ValueError("Invalid interval")
 
-			current_date += datetime.timedelta(days=1)
+		# one pass over the main in the interval, summing each day's main in order
+		totals = [0.0] * ((end_date - start_date).days + 1)
+		start, end = bisect_left(self._dates, start_date), bisect_right(self._dates, end_date)
+		for run in self._runs[start:end]:
+			totals[(run.date - start_date).days] += run.distance
 
 		return totals
 
@@ -229,7 +255,7 @@ class Runs:
 		kw args:
 			self -- Runs object
 		"""
-		return float(reduce(lambda total, run: total + float(run.distance), self._runs, 0))
+		return sum((run.distance for run in self._runs), 0.0)
 
 	def longest_run(self):
 		"""returns Run object with highest distance
@@ -237,7 +263,7 @@ class Runs:
 		kw args;
 			self -- Runs object
 		"""
-		return max(self._runs, key=lambda run: float(run.distance))
+		return max(self._runs, key=lambda run: run.distance)
 
 	def average(self):
 		"""computes average run distance
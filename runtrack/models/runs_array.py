@@ -0,0 +1,386 @@
+"""Contains RunsArray class"""
+
+import datetime
+from typing import List, Optional, Union
+
+import numpy as np
+
+from runtrack.models.records import RunRecord
+from runtrack.models.runs import Runs
+
+
+class RunsArray:
+	"""Columnar alternative to Runs.
+
+	Dates are stored as an int32 array of proleptic Gregorian ordinals and distances
+	as a float64 array, both sorted in nondecreasing order by date. The public API
+	matches Runs, but sums, maxima, averages and interval filters are vectorized.
+	"""
+
+	@staticmethod
+	def _to_arrays(runs) -> tuple:
+		"""converts a collection of runs into sorted date and distance arrays
+
+		:param runs: list of Run objects, or a Runs or RunsArray instance
+		:return: tuple of (dates, distances) arrays sorted by date
+		"""
+
+		if isinstance(runs, RunsArray):
+			return runs._dates, runs._distances
+
+		if isinstance(runs, Runs):
+			runs = runs._runs
+
+		count = len(runs)
+		dates = np.fromiter((run.date.toordinal() for run in runs), dtype=np.int32, count=count)
+		distances = np.fromiter((run.distance for run in runs), dtype=np.float64, count=count)
+
+		# a stable sort keeps runs on the same date in insertion order, like Runs
+		order = np.argsort(dates, kind="mergesort")
+		return dates[order], distances[order]
+
+	@classmethod
+	def _from_arrays(cls, dates: np.ndarray, distances: np.ndarray, date: datetime.date = None) -> "RunsArray":
+		"""builds a RunsArray from arrays that are already sorted by date
+
+		:param dates: int32 array of date ordinals
+		:param distances: float64 array of distances
+		:param date: the date of the runs
+		:return: new RunsArray object
+		"""
+
+		runs_array = cls.__new__(cls)
+		runs_array._dates = dates
+		runs_array._distances = distances
+		runs_array.date = date if date else runs_array._first_date()
+		return runs_array
+
+	def __init__(self, runs: Union[List[RunRecord], Runs, "RunsArray"] = None, date: datetime.date = None) -> None:
+		"""Combines runs into sorted columnar arrays
+
+		:param runs: a list of Run objects (or a Runs/RunsArray), defaults to empty
+		:param date: the date of the runs
+		"""
+
+		if runs is None:
+			runs = []
+
+		self._dates, self._distances = RunsArray._to_arrays(runs)
+
+		if date:
+			self.date = date
+			if len(self._dates) and self._dates[0] != self.date.toordinal():
+				raise ValueError("Date corresponds to earliest run")
+		else:
+			self.date = self._first_date()
+
+	def _first_date(self):
+		"""gets the date of the earliest run, or None if there are no runs"""
+
+		return datetime.date.fromordinal(int(self._dates[0])) if len(self._dates) else None
+
+	def _run(self, index: int) -> RunRecord:
+		"""builds a record of the run stored at index
+
+		:param index: position of the run in the arrays
+		:return: RunRecord with the stored date and distance
+		"""
+
+		return RunRecord(date=datetime.date.fromordinal(int(self._dates[index])), distance=float(self._distances[index]))
+
+	def empty(self) -> bool:
+		"""computes whether or not the arrays are empty
+
+		:return: whether or not there are any runs
+		"""
+
+		return not len(self._dates)
+
+	def __str__(self) -> str:
+		"""converts RunsArray object into a string
+
+		:return: representative string
+		"""
+
+		return str([self._run(i) for i in range(len(self))])
+
+	def __len__(self) -> int:
+		"""Gets length of RunsArray object
+
+		:return: number of runs in object
+		"""
+
+		return len(self._dates)
+
+	def __getitem__(self, key: Union[int, slice]) -> Union[RunRecord, List[RunRecord]]:
+		"""returns the run (or list of runs) at the given index
+
+		:param key: int or slice into the sorted runs
+		:return: requested Run object(s)
+		"""
+
+		if isinstance(key, slice):
+			return [self._run(i) for i in range(*key.indices(len(self)))]
+
+		if not -len(self) <= key < len(self):
+			raise IndexError("RunsArray index out of range")
+
+		return self._run(key)
+
+	def add_all(self, runs: Union[List[RunRecord], Runs, "RunsArray"]) -> None:
+		"""Merges a list of Run objects into the arrays
+
+		:param runs: runs to be merged
+		"""
+
+		new_dates, new_distances = RunsArray._to_arrays(runs)
+
+		# new runs go before existing runs on the same date, like Runs.add_all
+		positions = np.searchsorted(self._dates, new_dates, side="left")
+		self._dates = np.insert(self._dates, positions, new_dates)
+		self._distances = np.insert(self._distances, positions, new_distances)
+		self.date = self._first_date()
+
+	def add(self, run: RunRecord) -> None:
+		"""Adds a Run object to a RunsArray object
+
+		:param run: Run to be added
+		"""
+
+		self.add_all([run])
+
+	def extend(self, runs_instance: Union[Runs, "RunsArray"]) -> None:
+		"""Combines two Runs or RunsArray instances
+
+		:param runs_instance: object to be added
+		"""
+
+		self.add_all(runs_instance)
+
+	def _bounds(self, start_date: datetime.date, end_date: datetime.date) -> tuple:
+		"""finds the slice of the arrays that falls in [start_date, end_date]
+
+		:param start_date: first date in interval
+		:param end_date: last date in interval
+		:return: tuple of (start, end) indices
+		"""
+
+		if start_date > end_date:
+			raise ValueError("Invalid interval")
+
+		start = np.searchsorted(self._dates, start_date.toordinal(), side="left")
+		end = np.searchsorted(self._dates, end_date.toordinal(), side="right")
+		return start, end
+
+	def interval(self, start_date: datetime.date, end_date: datetime.date) -> "RunsArray":
+		"""gets all runs in a time interval
+
+		:param start_date: first date in interval
+		:param end_date: last date in interval
+		:return: RunsArray with the runs in the interval
+		"""
+
+		start, end = self._bounds(start_date, end_date)
+		return RunsArray._from_arrays(self._dates[start:end].copy(), self._distances[start:end].copy())
+
+	def last(self) -> RunRecord:
+		"""Gets the most recent run
+
+		:return: most recent Run object, or an empty Run
+		"""
+
+		return self._run(-1) if not self.empty() else RunRecord()
+
+	def first(self) -> RunRecord:
+		"""Gets the first recorded run
+
+		:return: earliest Run object, or an empty Run
+		"""
+
+		return self._run(0) if not self.empty() else RunRecord()
+
+	def one_day(self) -> bool:
+		"""Computes whether all runs have the same date
+
+		:return: whether all runs fall on one day
+		"""
+
+		return self.empty() or self._dates[0] == self._dates[-1]
+
+	def daily(self) -> List["RunsArray"]:
+		"""combines runs together based on day
+
+		:return: list of RunsArray objects, one per day with runs
+		"""
+
+		if self.empty():
+			return []
+
+		starts = np.concatenate(([0], np.flatnonzero(np.diff(self._dates)) + 1))
+		ends = np.append(starts[1:], len(self))
+		return [RunsArray._from_arrays(self._dates[start:end], self._distances[start:end])
+				for start, end in zip(starts, ends)]
+
+	def sum_between(self, start_date: datetime.date, end_date: datetime.date) -> float:
+		"""Sums the distances of runs in [start_date, end_date]
+
+		:param start_date: first date in interval
+		:param end_date: last date in interval
+		:return: total distance run in the interval
+		"""
+
+		start, end = self._bounds(start_date, end_date)
+		return float(self._distances[start:end].sum())
+
+	def daily_distances_between(self, start_date: datetime.date, end_date: datetime.date) -> List[float]:
+		"""returns a list of distances run daily in specified interval
+
+		:param start_date: first day
+		:param end_date: last day
+		:return: list with the total distance of each day
+		"""
+
+		return self._daily_from(start_date, end_date).tolist()
+
+	def _daily_from(self, first_day: datetime.date, end_date: datetime.date, counts: bool = False) -> np.ndarray:
+		"""bins the runs in [first_day, end_date] into a dense per-day array
+
+		:param first_day: first day
+		:param end_date: last day
+		:param counts: count the runs of each day instead of totalling their distances
+		:return: array with one entry per day
+		"""
+
+		start, end = self._bounds(first_day, end_date)
+		offsets = self._dates[start:end] - first_day.toordinal()
+		num_days = (end_date - first_day).days + 1
+		weights = None if counts else self._distances[start:end]
+		return np.bincount(offsets, weights=weights, minlength=num_days)
+
+	@staticmethod
+	def _window_totals(daily: np.ndarray, window: int) -> np.ndarray:
+		"""totals each window of consecutive days as the difference of two cumulative sums
+
+		:param daily: per-day array that starts window - 1 days before the first window ends
+		:param window: number of days in each window
+		:return: array with the total of the window ending on each day
+		"""
+
+		cumulative = np.concatenate(([0], np.cumsum(daily)))
+		return cumulative[window:] - cumulative[:-window]
+
+	def _check_windows(self, start_date: datetime.date, end_date: datetime.date, *windows: int) -> datetime.date:
+		"""validates an interval and window lengths
+
+		:param start_date: first day
+		:param end_date: last day
+		:param windows: numbers of days in the windows
+		:return: first day of the longest window ending on start_date
+		"""
+
+		if start_date > end_date:
+			raise ValueError("Invalid interval")
+		if min(windows) < 1:
+			raise ValueError("Window must be at least one day")
+		return start_date - datetime.timedelta(days=max(windows) - 1)
+
+	def rolling_totals_between(self, start_date: datetime.date, end_date: datetime.date,
+							   window: int = 7) -> List[float]:
+		"""returns the distance run in the window days ending on each day of the interval
+
+		The runs are binned into a dense per-day array once, so the cost is O(days + runs).
+
+		:param start_date: first day
+		:param end_date: last day
+		:param window: number of days in each window
+		:return: list with the rolling total of each day
+		"""
+
+		first_day = self._check_windows(start_date, end_date, window)
+		return self._window_totals(self._daily_from(first_day, end_date), window).tolist()
+
+	def rolling_average_run_between(self, start_date: datetime.date, end_date: datetime.date,
+									window: int = 7) -> List[float]:
+		"""returns the average run distance in the window days ending on each day of the interval
+
+		:param start_date: first day
+		:param end_date: last day
+		:param window: number of days in each window
+		:return: list with the rolling average of each day, 0 for windows without runs
+		"""
+
+		first_day = self._check_windows(start_date, end_date, window)
+		distances = self._window_totals(self._daily_from(first_day, end_date), window)
+		counts = self._window_totals(self._daily_from(first_day, end_date, counts=True), window)
+		return (distances / np.maximum(counts, 1)).tolist()
+
+	def workload_ratio_between(self, start_date: datetime.date, end_date: datetime.date,
+							   acute: int = 7, chronic: int = 28) -> List[Optional[float]]:
+		"""returns the acute:chronic workload ratio of each day of the interval
+
+		The ratio compares the distance run in the last acute days to the average
+		distance run per acute days over the last chronic days.
+
+		:param start_date: first day
+		:param end_date: last day
+		:param acute: number of days in the acute window
+		:param chronic: number of days in the chronic window
+		:return: list with the ratio of each day, None where nothing was run in the chronic window
+		"""
+
+		return self.training_load_between(start_date, end_date, acute, chronic)["ratio"]
+
+	def training_load_between(self, start_date: datetime.date, end_date: datetime.date,
+							  acute: int = 7, chronic: int = 28) -> dict:
+		"""computes every rolling training load series of the interval from one per-day array
+
+		:param start_date: first day
+		:param end_date: last day
+		:param acute: number of days in the acute window
+		:param chronic: number of days in the chronic window
+		:return: dict of lists with one entry per day: "acute" and "chronic" rolling
+			totals, the acute:chronic "ratio" (None where nothing was run in the chronic
+			window) and "average_run" over the chronic window
+		"""
+
+		first_day = self._check_windows(start_date, end_date, acute, chronic)
+		daily = self._daily_from(first_day, end_date)
+		daily_counts = self._daily_from(first_day, end_date, counts=True)
+		longest = max(acute, chronic)
+
+		acute_totals = self._window_totals(daily[longest - acute:], acute)
+		chronic_totals = self._window_totals(daily[longest - chronic:], chronic)
+		chronic_counts = self._window_totals(daily_counts[longest - chronic:], chronic)
+		expected = chronic_totals * acute / chronic
+
+		return {
+			"acute": acute_totals.tolist(),
+			"chronic": chronic_totals.tolist(),
+			"ratio": [float(total / baseline) if baseline > 0 else None
+					  for total, baseline in zip(acute_totals, expected)],
+			"average_run": (chronic_totals / np.maximum(chronic_counts, 1)).tolist(),
+		}
+
+	def sum(self) -> float:
+		"""Sums the distances of runs in the instance
+
+		:return: total distance
+		"""
+
+		return float(self._distances.sum())
+
+	def longest_run(self) -> RunRecord:
+		"""returns Run object with highest distance
+
+		:return: longest Run object
+		"""
+
+		return self._run(int(np.argmax(self._distances)))
+
+	def average(self) -> float:
+		"""computes average run distance
+
+		:return: average distance, or 0 if there are no runs
+		"""
+
+		return float(self._distances.mean()) if len(self) else 0
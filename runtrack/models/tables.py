@@ -3,15 +3,52 @@ database model classes:
 	User: user model
 	Run: run model
 	Goal: goal model
+	WeeklySummary: per-user weekly totals model
 """
 
 from datetime import datetime
 
-from sqlalchemy.dialects.postgresql import INTEGER, TEXT, TIMESTAMP, DATE
+from flask import current_app, has_app_context
+from sqlalchemy.dialects.postgresql import INTEGER, TEXT, TIMESTAMP, DATE, FLOAT
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 
-from runtrack.models import db, login
+from runtrack.models import db
+
+
+def parse_method(method):
+	"""splits a werkzeug hash method into its base method and pbkdf2 iteration count
+
+	e.g. "pbkdf2:sha256:50000" gives ("pbkdf2:sha256", 50000), and "pbkdf2:sha256" gives
+	("pbkdf2:sha256", None), which hashes with werkzeug's default count.
+	"""
+	parts = method.split(":")
+	if parts[0] == "pbkdf2" and len(parts) > 2:
+		return ":".join(parts[:2]), int(parts[2])
+	return method, None
+
+
+def hash_method(method, iterations=None):
+	"""the werkzeug hash method string for a base method and an iteration count
+
+	Iterations only apply to pbkdf2 methods; other methods carry their own parameters.
+	Without iterations, pbkdf2 uses the count given in method, or werkzeug's default.
+	"""
+	base, method_iterations = parse_method(method)
+	iterations = iterations if iterations is not None else method_iterations
+	if iterations is not None and iterations < 1:
+		raise ValueError("Password hash iterations must be at least 1, not {}".format(iterations))
+	if base.startswith("pbkdf2:") and iterations is not None:
+		return "{}:{}".format(base, iterations)
+	return method
+
+
+def password_method():
+	"""the werkzeug hash method for new passwords, from PASSWORD_HASH_METHOD and PASSWORD_HASH_ITERATIONS"""
+	if not has_app_context():
+		return "pbkdf2:sha256"
+	return hash_method(current_app.config.get("PASSWORD_HASH_METHOD") or "pbkdf2:sha256",
+					   current_app.config.get("PASSWORD_HASH_ITERATIONS"))
 
 
 class User(UserMixin, db.Model):
@@ -21,6 +58,7 @@ class User(UserMixin, db.Model):
 	name = db.Column(TEXT)
 	password_hash = db.Column(TEXT)
 	created_at = db.Column(TIMESTAMP, default=datetime.utcnow)
+	data_version = db.Column(INTEGER, default=0, server_default="0", nullable=False)
 
 	runs = db.relationship("Run", backref="user", lazy=True, cascade="save-update, merge, delete")
 	goals = db.relationship("Goal", backref="user", lazy=True, cascade="save-update, merge, delete")
@@ -29,16 +67,28 @@ class User(UserMixin, db.Model):
 		return "<User {}>".format(self.name)
 
 	def set_password(self, password):
-		self.password_hash = generate_password_hash(password)
+		self.password_hash = generate_password_hash(password, method=password_method())
 
 	def check_password(self, password):
 		return check_password_hash(self.password_hash, password)
 
+	def password_needs_rehash(self):
+		"""whether the stored hash was made with other parameters than the current ones
+
+		When no iteration count is configured, any count is current, so werkzeug's
+		default changing between versions does not rehash every user.
+		"""
+		stored_method, stored_iterations = parse_method(self.password_hash.split("$", 1)[0])
+		method, iterations = parse_method(password_method())
+		return stored_method != method or (iterations is not None and stored_iterations != iterations)
+
 
 class Run(db.Model):
+	__table_args__ = (db.Index("ix_run_user_id_date", "user_id", "date"),)
+
 	id = db.Column(INTEGER, primary_key=True, index=True)
-	user_id = db.Column(INTEGER, db.ForeignKey("user.id"), index=True)
-	distance = db.Column(TEXT)
+	user_id = db.Column(INTEGER, db.ForeignKey("user.id"))
+	distance = db.Column(FLOAT)
 	date = db.Column(DATE)
 
 	def __repr__(self):
@@ -46,15 +96,25 @@ class Run(db.Model):
 
 
 class Goal(db.Model):
+	__table_args__ = (db.Index("ix_goal_user_id_date", "user_id", "date"),)
+
 	id = db.Column(INTEGER, primary_key=True, index=True)
-	user_id = db.Column(INTEGER, db.ForeignKey("user.id"), index=True)
-	distance = db.Column(TEXT)
+	user_id = db.Column(INTEGER, db.ForeignKey("user.id"))
+	distance = db.Column(FLOAT)
 	date = db.Column(DATE)
 
 	def __repr__(self):
 		return "<Goal {} miles>".format(self.distance)
 
 
-@login.user_loader
-def load_user(user_id):
-	return User.query.get(int(user_id))
\ No newline at end of file
+class WeeklySummary(db.Model):
+	"""model that stores a user's totals for the week starting on monday"""
+	user_id = db.Column(INTEGER, db.ForeignKey("user.id"), primary_key=True)
+	monday = db.Column(DATE, primary_key=True)
+	total_distance = db.Column(FLOAT, default=0, nullable=False)
+	goal_total = db.Column(FLOAT, default=0, nullable=False)
+	run_count = db.Column(INTEGER, default=0, nullable=False)
+	longest_run = db.Column(FLOAT, default=0, nullable=False)
+
+	def __repr__(self):
+		return "<WeeklySummary {} {} miles>".format(self.monday, self.total_distance)
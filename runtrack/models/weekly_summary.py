@@ -0,0 +1,144 @@
+"""Keeps the weekly_summary table in step with a user's runs and goals"""
+
+from datetime import date
+from typing import List, Tuple
+
+from sqlalchemy.dialects import postgresql
+
+from runtrack.models import db
+from runtrack.models.tables import User, Run, Goal, WeeklySummary
+from runtrack.models.group_goal_runs import GroupGoalRuns, week_of, fill_weekly_totals
+from runtrack.models.queries import load_window, greatest
+
+
+def _upsert(user_id: int, monday: date, values: dict):
+	"""builds PostgreSQL's INSERT ... ON CONFLICT DO UPDATE that adds values to a week's row
+
+	:param user_id: id of the user
+	:param monday: first day of the week
+	:param values: totals to add, keyed by column
+	:return: insert statement
+	"""
+
+	table = WeeklySummary.__table__
+	insert = postgresql.insert(table).values(user_id=user_id, monday=monday, **values)
+	return insert.on_conflict_do_update(
+		index_elements=[table.c.user_id, table.c.monday],
+		set_={
+			"total_distance": table.c.total_distance + insert.excluded.total_distance,
+			"goal_total": table.c.goal_total + insert.excluded.goal_total,
+			"run_count": table.c.run_count + insert.excluded.run_count,
+			"longest_run": greatest(table.c.longest_run, insert.excluded.longest_run),
+		})
+
+
+def add_to_week(user_id: int, monday: date, distance: float = 0, goal: float = 0, runs: int = 0,
+				longest: float = 0) -> None:
+	"""adds totals to a week's summary in a single atomic statement. The caller commits the session.
+
+	The totals are incremented by the database rather than read and written back, so
+	concurrent writes to the same week are never lost. On PostgreSQL the first write to
+	a week is an INSERT ... ON CONFLICT DO UPDATE, so two first writes cannot collide.
+
+	:param user_id: id of the user
+	:param monday: first day of the week
+	:param distance: run distance to add
+	:param goal: goal distance to add (negative to reduce the week's goals)
+	:param runs: number of runs to add
+	:param longest: distance of the longest added run
+	"""
+
+	table = WeeklySummary.__table__
+	values = {"total_distance": distance, "goal_total": goal, "run_count": runs, "longest_run": longest}
+
+	if db.session.get_bind().dialect.name == "postgresql":
+		db.session.execute(_upsert(user_id, monday, values))
+		return
+
+	# elsewhere (SQLite) the UPDATE takes the database's write lock, so no other
+	# writer can add the week's row between it and the INSERT
+	updated = db.session.execute(table.update()
+		.where((table.c.user_id == user_id) & (table.c.monday == monday))
+		.values(total_distance=table.c.total_distance + distance,
+				goal_total=table.c.goal_total + goal,
+				run_count=table.c.run_count + runs,
+				longest_run=greatest(table.c.longest_run, longest)))
+	if not updated.rowcount:
+		db.session.execute(table.insert().values(user_id=user_id, monday=monday, **values))
+
+
+def record_run(run: Run) -> None:
+	"""adds a new run to its week's summary. The caller commits the session.
+
+	:param run: Run object that is being added
+	"""
+
+	add_to_week(run.user_id, week_of(run.date), distance=run.distance, runs=1, longest=run.distance)
+
+
+def record_goal(goal: Goal, previous_distance: float = 0) -> None:
+	"""adds a new or updated goal to its week's summary. The caller commits the session.
+
+	:param goal: Goal object that is being added or updated
+	:param previous_distance: the goal's distance before the update, if any
+	"""
+
+	add_to_week(goal.user_id, week_of(goal.date), goal=goal.distance - previous_distance)
+
+
+def rebuild(user: User) -> None:
+	"""recomputes all of a user's summary rows from their runs and goals. The caller commits the session.
+
+	:param user: User object whose summaries are rebuilt
+	"""
+
+	WeeklySummary.query.filter_by(user_id=user.id).delete()
+
+	goals, runs = load_window(user.id)
+	for week in GroupGoalRuns(goals, runs).weekly():
+		db.session.add(WeeklySummary(
+			user_id=user.id,
+			monday=week.monday,
+			total_distance=week.sum_runs(),
+			goal_total=week.sum_goals(),
+			run_count=week.num_runs(),
+			longest_run=week.longest_run().distance if week.num_runs() else 0))
+
+
+def mondays_before(user_id: int, before: date = None, limit: int = None) -> List[date]:
+	"""gets the Mondays of a user's weeks with runs or goals, newest first
+
+	Used as a keyset for paging through a user's history one window of weeks at a time.
+
+	:param user_id: id of the user
+	:param before: only weeks starting strictly before this date, or None for all weeks
+	:param limit: maximum number of Mondays returned
+	:return: list of Mondays in descending order
+	"""
+
+	query = db.session.query(WeeklySummary.monday) \
+		.filter(WeeklySummary.user_id == user_id) \
+		.filter((WeeklySummary.run_count > 0) | (WeeklySummary.goal_total != 0))
+	if before is not None:
+		query = query.filter(WeeklySummary.monday < before)
+
+	return [monday for monday, in query.order_by(WeeklySummary.monday.desc()).limit(limit).all()]
+
+
+def weekly_totals(user_id: int, at_least: int = 0) -> List[Tuple[date, float]]:
+	"""gets a user's weekly run totals, including empty weeks up to the current week
+
+	Matches GroupGoalRuns.weekly(dummy=True, at_least=at_least) followed by weekly_distances.
+
+	:param user_id: id of the user
+	:param at_least: minimum number of weeks returned
+	:return: list of (monday, total distance) tuples in date order
+	"""
+
+	rows = db.session.query(WeeklySummary.monday, WeeklySummary.total_distance) \
+		.filter(WeeklySummary.user_id == user_id) \
+		.filter((WeeklySummary.run_count > 0) | (WeeklySummary.goal_total != 0)) \
+		.order_by(WeeklySummary.monday) \
+		.all()
+
+	return fill_weekly_totals([(monday, total_distance) for monday, total_distance in rows], at_least)
@@ -4,14 +4,27 @@ Contains form classes:
     RegistrationForm: registration form
     AddRunForm: adds a run
     AddGoalForm: adds a goal
+    ImportForm: imports a file of runs and goals
 """
 
+import math
+
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, BooleanField, DateField
-from wtforms.validators import ValidationError, DataRequired, Email, EqualTo
+from flask_wtf.file import FileField, FileRequired, FileAllowed
+from wtforms import StringField, PasswordField, BooleanField, DateField, FloatField
+from wtforms.validators import ValidationError, DataRequired, InputRequired, Email, EqualTo, NumberRange
 from runtrack.models.tables import User
 
 
+def finite(form, field):
+    """validate that a number field is finite, since inf and nan cannot be summed or charted
+    :param form: form the field belongs to
+    :param field: number field
+    """
+    if field.data is not None and not math.isfinite(field.data):
+        raise ValidationError("Distance must be a finite number.")
+
+
 class LoginForm(FlaskForm):
     """Form that takes care of user login."""
     email = StringField('Email', validators=[DataRequired(), Email()])
@@ -39,11 +52,16 @@ class RegistrationForm(FlaskForm):
 
 class AddRunForm(FlaskForm):
     """Form that allows a user to add a run"""
-    distance = StringField('distance', validators=[DataRequired()])
+    distance = FloatField('distance', validators=[InputRequired(), NumberRange(min=0), finite])
     date = DateField('Date', validators=[DataRequired()])
 
 
 class AddGoalForm(FlaskForm):
     """Form that allows a user to add a goal."""
-    distance = StringField('distance', validators=[DataRequired()])
+    distance = FloatField('distance', validators=[InputRequired(), NumberRange(min=0), finite])
     date = DateField('Date', validators=[DataRequired()])
+
+
+class ImportForm(FlaskForm):
+    """Form that allows a user to import runs and goals from a CSV or GPX file."""
+    file = FileField('File', validators=[FileRequired(), FileAllowed(['csv', 'gpx'], 'Only CSV and GPX files can be imported.')])
@@ -0,0 +1,178 @@
+"""pytest fixtures shared by the runtrack tests"""
+
+import random
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pytest
+from flask.testing import FlaskClient
+from sqlalchemy import event
+
+from config import Config
+from runtrack import create_app
+from runtrack.models import db as _db
+from runtrack.models import weekly_summary
+from runtrack.models.tables import User, Run, Goal, WeeklySummary
+
+
+class TestConfig(Config):
+	"""configuration that runs the app against an in-memory SQLite database"""
+	TESTING = True
+	WTF_CSRF_ENABLED = False
+	SQLALCHEMY_DATABASE_URI = "sqlite://"
+	CACHE_TYPE = "simple"
+	PASSWORD_HASH_ITERATIONS = 1000
+	METRICS_ENABLED = True
+	METRICS_TOKEN = "scraper"
+
+
+class RequestClient(FlaskClient):
+	"""test client that gives every request its own app context, as a server would"""
+
+	def open(self, *args, **kwargs):
+		with self.application.app_context():
+			return FlaskClient.open(self, *args, **kwargs)
+
+
+@pytest.fixture
+def app_config():
+	"""the config class the app fixture is created with, for tests that change a setting"""
+	return TestConfig
+
+
+@pytest.fixture
+def app():
+	"""app with a fresh database, inside an app context"""
+	app = create_app(TestConfig)
+	app.test_client_class = RequestClient
+	with app.app_context():
+		_db.create_all()
+		yield app
+		_db.session.remove()
+		_db.drop_all()
+
+
+@pytest.fixture
+def db(app):
+	"""the database, with its tables created"""
+	return _db
+
+
+@pytest.fixture
+def query_budget(app, db):
+	"""context manager that fails the test if the block runs more than limit SQL statements
+
+	The block starts with an empty session and runs in a fresh app context, so each
+	request loads its user the way it would outside the tests.
+
+		with query_budget(1):
+			client.get("/index")
+	"""
+
+	@contextmanager
+	def budget(limit):
+		statements = []
+
+		def record(conn, cursor, statement, parameters, context, executemany):
+			statements.append("{} {}".format(statement, parameters))
+
+		db.session.remove()
+		engine = db.engine
+		event.listen(engine, "before_cursor_execute", record)
+		try:
+			with app.app_context():
+				yield statements
+		finally:
+			event.remove(engine, "before_cursor_execute", record)
+
+		if len(statements) > limit:
+			pytest.fail("{} SQL statements over a budget of {}:\n{}".format(
+				len(statements), limit,
+				"\n".join("{}. {}".format(number, statement) for number, statement in enumerate(statements, 1))))
+
+	return budget
+
+
+@pytest.fixture
+def make_goals_runs():
+	"""function that builds random goals and main ending near today
+
+		goals, runs = make_goals_runs(seed, days=200)
+	"""
+
+	def make(seed, days=200):
+		rand = random.Random(seed)
+		start = date.today() - timedelta(days=rand.randrange(days, 2 * days))
+		runs = [Run(date=start + timedelta(days=rand.randrange(days)), distance=float(rand.randint(1, 9)))
+				for _ in range(rand.randrange(1, 80))]
+		goal_dates = set(start + timedelta(days=rand.randrange(days)) for _ in range(20))
+		goals = [Goal(date=goal_date, distance=float(rand.randint(0, 5))) for goal_date in goal_dates]
+		return goals, runs
+
+	return make
+
+
+@pytest.fixture
+def add_user(db, make_goals_runs):
+	"""function that adds a user, with the random goals and main of a seed if one is given
+
+	The main and goals are recorded one write at a time, as the app records them, so the
+	user's weekly summaries are maintained on write.
+
+		user = add_user(seed)
+	"""
+
+	def add(seed=None):
+		user = User(email="runner{}@example.com".format("" if seed is None else seed), name="runner")
+		db.session.add(user)
+		db.session.commit()
+		if seed is None:
+			return user
+
+		goals, runs = make_goals_runs(seed)
+		for run in runs:
+			run.user_id = user.id
+			db.session.add(run)
+			weekly_summary.record_run(run)
+			db.session.commit()
+
+		for goal in goals:
+			goal.user_id = user.id
+			db.session.add(goal)
+			weekly_summary.record_goal(goal)
+			db.session.commit()
+
+		return user
+
+	return add
+
+
+@pytest.fixture
+def summary_rows(db):
+	"""function that gets a user's summary rows as comparable tuples
+
+		rows = summary_rows(user)
+	"""
+
+	def rows(user):
+		summaries = WeeklySummary.query.filter_by(user_id=user.id).order_by(WeeklySummary.monday).all()
+		return [(row.monday, row.total_distance, row.goal_total, row.run_count, row.longest_run)
+				for row in summaries if row.run_count or row.goal_total]
+
+	return rows
+
+
+@pytest.fixture
+def login_client(app):
+	"""function that gives a test client with a user logged in
+
+		client = login_client(user)
+	"""
+
+	def login(user):
+		client = app.test_client()
+		with client.session_transaction() as session:
+			session["_user_id"] = str(user.id)
+		return client
+
+	return login
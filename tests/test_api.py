@@ -0,0 +1,58 @@
+"""Tests for the JSON chart-data endpoints"""
+
+from datetime import date, timedelta
+
+from runtrack.models.group_goal_runs import week_of
+
+
+def test_chart_etag_and_not_modified(app, db, add_user, login_client):
+	"""chart data carries a strong ETag and a matching If-None-Match gets an empty 304"""
+	client = login_client(add_user(7))
+
+	for url in ["/api/charts/daily", "/api/charts/weekly", "/api/charts/alltime"]:
+		response = client.get(url)
+		etag = response.headers["ETag"]
+		assert response.status_code == 200 and not etag.startswith("W/")
+		assert len(response.get_json()["labels"]) == len(response.get_json()["data"])
+
+		response = client.get(url, headers={"If-None-Match": etag})
+		assert response.status_code == 304 and response.data == b""
+		assert response.headers["ETag"] == etag
+
+
+def test_chart_etag_changes_with_data(app, db, add_user, login_client):
+	"""adding a run changes the ETag, and the new data includes the run"""
+	user = add_user(8)
+	client = login_client(user)
+	monday = week_of(date.today())
+	url = "/api/charts/week/{}".format(monday.isoformat())
+	before = client.get(url)
+
+	client.post("/add_run", data={"distance": "12.5", "date": monday.isoformat()})
+	after = client.get(url, headers={"If-None-Match": before.headers["ETag"]})
+
+	assert after.status_code == 200
+	assert after.headers["ETag"] != before.headers["ETag"]
+	assert after.get_json()["data"][0] == before.get_json()["data"][0] + 12.5
+
+
+def test_week_chart_requires_a_monday(app, db, add_user, login_client):
+	"""weeks are addressed by their Monday"""
+	client = login_client(add_user(9))
+	tuesday = week_of(date.today()) + timedelta(days=1)
+
+	assert client.get("/api/charts/week/{}".format(tuesday.isoformat())).status_code == 404
+	assert client.get("/api/charts/week/not-a-date").status_code == 404
+
+
+def test_load_chart(app, db, add_user, login_client):
+	"""the training load chart has one value per day in every series"""
+	client = login_client(add_user(9))
+	response = client.get("/api/charts/load")
+	series = response.get_json()
+
+	assert response.status_code == 200 and response.headers["ETag"]
+	assert len(series["labels"]) == 84
+	for name in ["acute", "chronic", "ratio", "average_run"]:
+		assert len(series[name]) == len(series["labels"])
+	assert client.get("/api/charts/load", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
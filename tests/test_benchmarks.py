@@ -0,0 +1,13 @@
+"""Smoke test for the models benchmark suite"""
+
+from benchmarks import models
+
+
+def test_benchmarks_run_and_compare():
+	"""a small run produces a timing for every size, and matches itself in a comparison"""
+	names = ["runs.add", "runs.daily"]
+	results = models.run([10, 50], names, repeat=1)
+
+	assert sorted(results["results"]) == names
+	assert all(sorted(timings) == ["10", "50"] for timings in results["results"].values())
+	assert [ratio for name, size, old, new, ratio in models.compare(results, results)] == [1.0] * 4
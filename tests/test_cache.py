@@ -0,0 +1,187 @@
+"""Tests for the cache and the cached dashboard"""
+
+import fnmatch
+import os
+import socket
+import socketserver
+import threading
+import time
+from datetime import date
+
+import pytest
+
+from runtrack.cache import BaseCache, LRUCache, FileSystemCache, RedisCache
+from runtrack.models import cache
+from runtrack.models.tables import User, Run
+from runtrack.models import dashboard, weekly_summary
+
+
+class RedisStandIn(socketserver.StreamRequestHandler):
+	"""answers the handful of Redis commands RedisCache uses, from a dict"""
+
+	def read_command(self):
+		line = self.rfile.readline()
+		if not line:
+			return None
+		args = []
+		for _ in range(int(line[1:])):
+			length = int(self.rfile.readline()[1:])
+			args.append(self.rfile.read(length + 2)[:-2])
+		return args
+
+	def reply(self, value):
+		if value is None:
+			self.wfile.write(b"$-1\r\n")
+		elif isinstance(value, int):
+			self.wfile.write(b":%d\r\n" % value)
+		elif isinstance(value, list):
+			self.wfile.write(b"*%d\r\n" % len(value))
+			for item in value:
+				self.reply(item)
+		else:
+			self.wfile.write(b"$%d\r\n%s\r\n" % (len(value), value))
+
+	def handle(self):
+		store = self.server.store
+		while True:
+			args = self.read_command()
+			if args is None:
+				return
+			name = args[0].upper()
+			if name == b"GET":
+				expires_at, value = store.get(args[1], (0, None))
+				self.reply(None if expires_at and expires_at <= time.time() else value)
+			elif name == b"SET":
+				expires_at = time.time() + int(args[4]) if len(args) > 3 else 0
+				store[args[1]] = (expires_at, args[2])
+				self.wfile.write(b"+OK\r\n")
+			elif name == b"DEL":
+				self.reply(sum(1 for key in args[1:] if store.pop(key, None) is not None))
+			elif name == b"SCAN":
+				pattern = args[3].decode("utf-8")
+				self.reply([b"0", [key for key in store if fnmatch.fnmatch(key.decode("utf-8"), pattern)]])
+			else:
+				self.wfile.write(b"-ERR unknown command\r\n")
+
+
+@pytest.fixture
+def redis_url():
+	"""url of a local Redis stand-in server"""
+	server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), RedisStandIn)
+	server.daemon_threads = True
+	server.store = {}
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	yield "redis://127.0.0.1:{}/0".format(server.server_address[1])
+	server.shutdown()
+	server.server_close()
+
+
+@pytest.fixture(params=["simple", "filesystem", "redis"])
+def backend(request, tmpdir):
+	"""each cache backend in turn"""
+	if request.param == "simple":
+		return LRUCache()
+	if request.param == "filesystem":
+		return FileSystemCache(str(tmpdir))
+	return RedisCache(request.getfixturevalue("redis_url"))
+
+
+def test_backends_share_an_interface(backend):
+	"""every backend stores, expires, deletes and clears values and counts hits"""
+	backend.set("week", {"total": 12.5})
+	backend.set("gone", [1], timeout=1)
+	assert backend.get("week") == {"total": 12.5}
+	assert backend.get("missing") is None
+
+	backend.delete("week")
+	assert backend.get("week") is None
+
+	time.sleep(1.1)
+	assert backend.get("gone") is None
+
+	backend.set("a", 1)
+	backend.clear()
+	assert backend.get("a") is None
+	assert backend.stats()["hits"] == 1
+	assert backend.stats()["misses"] == 4
+
+
+def test_filesystem_cache_is_shared(tmpdir):
+	"""two FileSystemCache objects on one directory see each other's values"""
+	writer, reader = FileSystemCache(str(tmpdir)), FileSystemCache(str(tmpdir))
+	writer.set("key", "value")
+	assert reader.get("key") == "value"
+
+
+def test_base_cache_is_abstract():
+	"""backends must implement get, set, delete and clear"""
+	with pytest.raises(TypeError):
+		BaseCache()
+
+
+def test_unreachable_redis_is_a_miss():
+	"""a cache server that is down counts as a miss, and writes and deletes are skipped, instead of raising"""
+	listener = socket.socket()
+	listener.bind(("127.0.0.1", 0))
+	port = listener.getsockname()[1]
+	listener.close()
+	unreachable = RedisCache("redis://127.0.0.1:{}/0".format(port), socket_timeout=0.2)
+
+	unreachable.set("key", "value")
+	assert unreachable.get("key") is None
+	assert unreachable.stats()["misses"] == 1
+	unreachable.delete("key")
+	unreachable.clear()
+
+
+def test_redis_failed_auth_closes_the_connection(redis_url):
+	"""a rejected AUTH does not leave an unauthenticated connection open"""
+	protected = RedisCache(redis_url.replace("redis://", "redis://:secret@"))
+
+	assert protected.get("key") is None
+	assert protected._socket is None
+
+
+def test_filesystem_cache_write_failure_is_skipped(tmpdir):
+	"""a cache directory that cannot be written to skips the write"""
+	directory = str(tmpdir.join("cache"))
+	broken = FileSystemCache(directory)
+	os.rmdir(directory)
+
+	broken.set("key", "value")
+	assert broken.get("key") is None
+
+
+def test_lru_cache_evicts_least_recently_used():
+	"""a full LRUCache drops the key that was used longest ago"""
+	lru = LRUCache(threshold=2)
+	lru.set("a", 1)
+	lru.set("b", 2)
+	assert lru.get("a") == 1
+	lru.set("c", 3)
+
+	assert lru.get("b") is None
+	assert lru.get("a") == 1 and lru.get("c") == 3
+	assert lru.stats() == {"hits": 3, "misses": 1, "size": 2}
+
+
+def test_dashboard_is_cached_until_data_version_changes(db):
+	"""the dashboard is computed once per data version"""
+	user = User(email="runner@example.com", name="runner")
+	db.session.add(user)
+	db.session.commit()
+
+	first = dashboard.dashboard(user)
+	assert dashboard.dashboard(user) is first
+	assert cache.stats()["hits"] == 1
+
+	run = Run(user_id=user.id, date=date.today(), distance=5.0)
+	db.session.add(run)
+	weekly_summary.record_run(run)
+	dashboard.bump_data_version(user.id)
+	db.session.commit()
+
+	updated = dashboard.dashboard(user)
+	assert updated is not first
+	assert updated["daily_runs"][-1] == 5.0
+	assert updated["alltime_runs"][-1] == 5.0
@@ -0,0 +1,68 @@
+"""Tests for the config classes and the engine options built from them"""
+
+import pytest
+
+from config import Config, ProductionConfig, DEVELOPMENT_SECRET_KEY, config_from_env
+from runtrack import create_app, engine_options
+
+
+def config_dict(config_class, **overrides):
+	"""the settings of a config class as a dict"""
+	config = {name: getattr(config_class, name) for name in dir(config_class) if name.isupper()}
+	config.update(overrides)
+	return config
+
+
+def test_postgres_engine_options():
+	"""PostgreSQL gets pool options, a statement timeout and an application name"""
+	options = engine_options(config_dict(ProductionConfig, SQLALCHEMY_DATABASE_URI="postgresql://db/runtrack",
+										 DB_STATEMENT_TIMEOUT=5000, DB_SSLMODE="require"))
+
+	assert options["pool_pre_ping"] is True
+	assert options["pool_size"] == ProductionConfig.DB_POOL_SIZE
+	assert options["connect_args"] == {"application_name": "runtrack", "connect_timeout": 10,
+									   "options": "-c statement_timeout=5000", "sslmode": "require"}
+
+
+def test_sqlite_engine_options():
+	"""SQLite is not pooled, so it gets no options"""
+	assert engine_options(config_dict(Config, SQLALCHEMY_DATABASE_URI="sqlite://")) == {}
+
+
+def test_explicit_engine_options_win(app_config):
+	"""SQLALCHEMY_ENGINE_OPTIONS in a config override the DB_* settings"""
+
+	class EchoConfig(app_config):
+		SQLALCHEMY_ENGINE_OPTIONS = {"echo": False}
+
+	assert create_app(EchoConfig).config["SQLALCHEMY_ENGINE_OPTIONS"] == {"echo": False}
+
+
+def test_production_is_the_default(monkeypatch):
+	"""without RUNTRACK_ENV the app runs with production settings and debugging off"""
+	monkeypatch.delenv("RUNTRACK_ENV", raising=False)
+
+	assert config_from_env() is ProductionConfig
+	assert ProductionConfig.DEBUG is False
+
+
+def test_production_requires_secret_key_and_database():
+	"""ProductionConfig refuses to start without a real SECRET_KEY or a DATABASE_URL"""
+
+	class Unconfigured(ProductionConfig):
+		SECRET_KEY = None
+		SQLALCHEMY_DATABASE_URI = None
+
+	class FallbackKey(ProductionConfig):
+		SECRET_KEY = DEVELOPMENT_SECRET_KEY
+		SQLALCHEMY_DATABASE_URI = "sqlite://"
+
+	class Configured(ProductionConfig):
+		SECRET_KEY = "a real secret"
+		SQLALCHEMY_DATABASE_URI = "sqlite://"
+
+	with pytest.raises(RuntimeError, match="SECRET_KEY, SQLALCHEMY_DATABASE_URI"):
+		create_app(Unconfigured)
+	with pytest.raises(RuntimeError, match="SECRET_KEY"):
+		create_app(FallbackKey)
+	assert create_app(Configured).debug is False
@@ -0,0 +1,34 @@
+"""Tests for streaming exports of a user's history"""
+
+import json
+from io import BytesIO
+
+from runtrack.models.tables import User
+from runtrack.models import exporter, importer
+
+
+def test_csv_export_round_trips_through_import(db, add_user, summary_rows):
+	"""an exported CSV file imports back to the same runs, goals and summaries"""
+	user = add_user(4)
+	data = "".join(exporter.export(user.id, "csv", batch_size=5)).encode("utf-8")
+
+	copy = User(email="copy@example.com", name="copy")
+	db.session.add(copy)
+	db.session.commit()
+	result = importer.import_file(copy.id, BytesIO(data), "csv")
+
+	assert result.errors == []
+	assert (result.runs, result.goals) == (len(user.runs), len(user.goals))
+	assert summary_rows(copy) == summary_rows(user)
+
+
+def test_jsonl_export_chunks(db, add_user):
+	"""JSON lines exports come in chunks of batch_size rows, runs before goals"""
+	user = add_user(6)
+	chunks = list(exporter.export(user.id, "jsonl", batch_size=3))
+	rows = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+
+	assert all(chunk.count("\n") == 3 for chunk in chunks[:-1])
+	assert len(rows) == len(user.runs) + len(user.goals)
+	assert [row["type"] for row in rows] == ["run"] * len(user.runs) + ["goal"] * len(user.goals)
+	assert [row["date"] for row in rows[:len(user.runs)]] == sorted(str(run.date) for run in user.runs)
@@ -0,0 +1,12 @@
+"""Tests for the form validators"""
+
+from runtrack.views.forms import AddRunForm, AddGoalForm
+
+
+def test_distance_must_be_finite(app):
+	"""run and goal distances reject inf and nan, like the importer does"""
+	for form_class in (AddRunForm, AddGoalForm):
+		for distance, valid in [("5.5", True), ("0", True), ("-1", False),
+								("inf", False), ("1e309", False), ("nan", False)]:
+			with app.test_request_context(method="POST", data={"distance": distance, "date": "2019-03-04"}):
+				assert form_class().validate() == valid, (form_class.__name__, distance)
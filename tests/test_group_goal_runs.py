@@ -0,0 +1,176 @@
+"""Tests for the GroupGoalRuns and GroupGoalRunsWeekly classes"""
+
+from datetime import date, timedelta
+from itertools import count, islice
+
+import pytest
+
+from runtrack.models.tables import Run
+from runtrack.models.runs import Runs
+from runtrack.models.records import RunRecord, GoalRecord
+from runtrack.models.group_goal_runs import GroupGoalRuns, GroupGoalRunsWeekly, iter_goal_runs, iter_weekly
+
+
+def test_weekly_buckets_by_calendar_week(make_goals_runs):
+	"""every week holds exactly the goals and main dated Monday through Sunday"""
+	for seed in range(20):
+		goals, runs = make_goals_runs(seed)
+		weeks = GroupGoalRuns(goals, runs).weekly()
+
+		assert sum(week.num_runs() for week in weeks) == len(runs)
+		for week in weeks:
+			assert week.monday.weekday() == 0
+			assert week.sum_runs() == sum(run.distance for run in runs if week.monday <= run.date <= week.sunday)
+			assert week.sum_goals() == sum(goal.distance for goal in goals if week.monday <= goal.date <= week.sunday)
+
+
+def test_weekly_dummy_weeks(make_goals_runs):
+	"""dummy weeks fill every gap up to the current week"""
+	goals, runs = make_goals_runs(1)
+	weeks = GroupGoalRuns(goals, runs).weekly(dummy=True, at_least=3)
+	mondays = [week.monday for week in weeks]
+	today = date.today()
+
+	assert all((later - earlier).days == 7 for earlier, later in zip(mondays, mondays[1:]))
+	assert mondays[-1] == today - timedelta(days=today.weekday())
+
+
+def test_weekly_dummy_weeks_until(make_goals_runs):
+	"""dummy weeks can end at a fixed date instead of today"""
+	goals, runs = make_goals_runs(1)
+	last = max(goal_runs.date for goal_runs in goals + runs)
+	until = last + timedelta(weeks=3)
+	weeks = GroupGoalRuns(goals, runs).weekly(dummy=True, until=until)
+
+	assert weeks[-1].monday == until - timedelta(days=until.weekday())
+	assert GroupGoalRuns().weekly(at_least=2, until=until)[-1].monday == weeks[-1].monday
+
+
+def test_weekly_at_least():
+	"""weekly pads the front with empty weeks"""
+	today = date.today()
+	weeks = GroupGoalRuns().weekly(at_least=4)
+
+	assert len(weeks) == 4
+	assert weeks[-1].monday == today - timedelta(days=today.weekday())
+	assert GroupGoalRuns.weekly_distances(weeks) == [0, 0, 0, 0]
+
+
+def test_weekly_statistics(make_goals_runs):
+	"""cached weekly statistics match a Runs built from the week's main"""
+	goals, runs = make_goals_runs(2)
+	for week in GroupGoalRuns(goals, runs).weekly():
+		week_runs = Runs([run for run in runs if week.monday <= run.date <= week.sunday])
+
+		assert week.num_runs() == len(week_runs)
+		assert week.average_run() == week_runs.average()
+		assert week.daily_distances() == week_runs.daily_distances_between(week.monday, week.sunday)
+		if len(week_runs):
+			assert week.longest_run().distance == week_runs.longest_run().distance
+		else:
+			assert week.longest_run().distance == 0
+
+
+def test_weekly_add_run_clears_statistics(make_goals_runs):
+	"""adding a run to a week updates its cached statistics"""
+	goals, runs = make_goals_runs(6)
+	week = GroupGoalRuns(goals, runs).weekly()[0]
+	total, count = week.sum_runs(), week.num_runs()
+
+	week.add_run(Run(date=week.sunday, distance=100.0))
+
+	assert week.sum_runs() == total + 100
+	assert week.num_runs() == count + 1
+	assert week.longest_run().distance == 100
+	assert week.daily_distances()[6] >= 100
+
+
+def test_weekly_add_run_leaves_group_unchanged(make_goals_runs):
+	"""adding a run to a week does not change the GroupGoalRuns it came from"""
+	goals, runs = make_goals_runs(6)
+	group = GroupGoalRuns(goals, runs)
+	total = group.sum_runs()
+	week = group.weekly()[0]
+
+	for goalruns in week:
+		week.add_run(Run(date=goalruns.date, distance=100.0))
+
+	assert group.sum_runs() == total == sum(goalruns.sum() for goalruns in group)
+	assert group.num_runs() == len(runs)
+
+
+def test_weekly_rejects_dates_outside_the_week(make_goals_runs):
+	"""main and goals must fall between the week's Monday and Sunday"""
+	goals, runs = make_goals_runs(6)
+	week = GroupGoalRuns(goals, runs).weekly()[0]
+
+	with pytest.raises(ValueError):
+		week.add_run(Run(date=week.monday - timedelta(days=1), distance=1.0))
+	with pytest.raises(ValueError):
+		week.add_run(Run(date=week.sunday + timedelta(days=1), distance=1.0))
+	with pytest.raises(ValueError):
+		GroupGoalRunsWeekly(week.monday, runs=[Run(date=week.sunday + timedelta(days=1), distance=1.0)])
+
+
+def by_date(items):
+	"""sorts goals or main by date, keeping the original order within a day"""
+	return sorted(items, key=lambda item: item.date)
+
+
+def test_iter_goal_runs_matches_group_goal_runs(make_goals_runs):
+	"""the lazy merge yields the same days, goals and main as GroupGoalRuns"""
+	for seed in range(20):
+		goals, runs = make_goals_runs(seed)
+		expected = GroupGoalRuns(goals, runs)
+		merged = list(iter_goal_runs(iter(by_date(goals)), iter(by_date(runs))))
+
+		assert [goalruns.date for goalruns in merged] == [goalruns.date for goalruns in expected]
+		assert [goalruns.goal.distance for goalruns in merged] == [goalruns.goal.distance for goalruns in expected]
+		assert [goalruns.runs.sum() for goalruns in merged] == [goalruns.runs.sum() for goalruns in expected]
+
+
+def test_iter_weekly_matches_weekly(make_goals_runs):
+	"""weeks built lazily match weekly()"""
+	for seed in range(20):
+		goals, runs = make_goals_runs(seed)
+		expected = GroupGoalRuns(goals, runs).weekly()
+		weeks = list(iter_weekly(iter_goal_runs(by_date(goals), by_date(runs))))
+
+		assert [week.monday for week in weeks] == [week.monday for week in expected]
+		assert [week.sum_runs() for week in weeks] == [week.sum_runs() for week in expected]
+		assert [week.sum_goals() for week in weeks] == [week.sum_goals() for week in expected]
+
+
+def test_iter_goal_runs_is_lazy():
+	"""consumers can stop early on endless streams of goals and main"""
+	start = date(2019, 1, 7)
+	runs = (RunRecord(start + timedelta(days=day), 1.0) for day in count())
+	goals = (GoalRecord(start + timedelta(days=2 * day), 3.0) for day in count())
+	merged = iter_goal_runs(goals, runs)
+
+	first = next(merged)
+	assert first.date == start and first.goal.distance == 3 and first.runs.sum() == 1
+
+	window = list(islice(merged, 13))
+	assert [goalruns.date for goalruns in window] == [start + timedelta(days=day) for day in range(1, 14)]
+
+	week = next(iter_weekly(merged))
+	assert week.monday == start + timedelta(days=14)
+	assert week.sum_runs() == 7
+
+
+def test_iter_goal_runs_rejects_unsorted_input():
+	"""goals or main out of date order raise ValueError"""
+	runs = [RunRecord(date(2019, 1, 2), 1.0), RunRecord(date(2019, 1, 1), 1.0)]
+
+	with pytest.raises(ValueError):
+		list(iter_goal_runs([], runs))
+	with pytest.raises(ValueError):
+		list(iter_goal_runs([GoalRecord(run.date, 1.0) for run in runs], []))
+
+
+def test_iter_goal_runs_without_input():
+	"""merging nothing yields nothing"""
+	assert list(iter_goal_runs([], [])) == []
+	assert list(iter_weekly([])) == []
+	assert list(islice(iter_goal_runs(iter([]), iter([])), 1)) == []
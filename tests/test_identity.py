@@ -0,0 +1,27 @@
+"""Tests for the cached identity of the logged-in user"""
+
+from runtrack.models import identity
+
+
+def test_load_user_is_cached_until_the_user_changes(app, db, add_user):
+	"""a changed User row is loaded again, with its new values"""
+	user = add_user(16)
+	assert identity.load_user(str(user.id)).name == "runner"
+
+	user.name = "renamed"
+	db.session.commit()
+
+	assert identity.load_user(str(user.id)).name == "renamed"
+
+
+def test_current_user_loads_orm_user_lazily(app, db, add_user):
+	"""attributes that are not cached come from the User row"""
+	user = add_user(17)
+	current = identity.load_user(str(user.id))
+
+	assert current._user is None
+	assert current.data_version == user.data_version
+	assert current._user is None
+	assert len(current.runs) == len(user.runs)
+	assert current.orm_user() is user
+	assert identity.load_user("12345") is None
@@ -0,0 +1,66 @@
+"""Tests for importing runs and goals from CSV and GPX files"""
+
+from io import BytesIO
+
+from runtrack.models.tables import Run, Goal
+from runtrack.models import weekly_summary, importer
+
+
+GPX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1">
+	<trk><trkseg>
+		<trkpt lat="0.0" lon="0.0"><time>2019-03-04T07:00:00Z</time></trkpt>
+		<trkpt lat="0.0" lon="0.01"><time>2019-03-04T07:05:00Z</time></trkpt>
+		<trkpt lat="0.0" lon="0.02"><time>2019-03-04T07:10:00Z</time></trkpt>
+	</trkseg></trk>
+	<trk><trkseg>
+		<trkpt lat="0.0" lon="0.0"><time>2019-03-06T07:00:00Z</time></trkpt>
+		<trkpt lat="0.01" lon="0.0"><time>2019-03-06T07:05:00Z</time></trkpt>
+	</trkseg></trk>
+</gpx>
+"""
+
+
+def test_csv_import_matches_rebuild(db, add_user, summary_rows, make_goals_runs):
+	"""imported runs and goals land in the tables and the weekly summaries"""
+	user = add_user()
+	goals, runs = make_goals_runs(3)
+	lines = ["type,date,distance"]
+	lines += ["run,{},{}".format(run.date, run.distance) for run in runs]
+	lines += ["goal,{},{}".format(goal.date, goal.distance) for goal in goals]
+	# a second goal for the same date replaces the first
+	lines.append("goal,{},{}".format(goals[0].date, goals[0].distance + 1))
+
+	result = importer.import_file(user.id, BytesIO("\n".join(lines).encode("utf-8")), "csv", batch_size=7)
+
+	assert result.errors == []
+	assert (result.runs, Run.query.filter_by(user_id=user.id).count()) == (len(runs), len(runs))
+	assert Goal.query.filter_by(user_id=user.id).count() == len(goals)
+	assert Goal.query.filter_by(user_id=user.id, date=goals[0].date).one().distance == goals[0].distance + 1
+
+	imported = summary_rows(user)
+	weekly_summary.rebuild(user)
+	assert imported == summary_rows(user)
+
+
+def test_csv_import_rolls_back_invalid_files(db, add_user):
+	"""a file with an invalid row writes nothing"""
+	user = add_user()
+	data = b"date,distance\n2019-03-04,3\n2019-03-05,-1\n03/06/2019,2\n"
+
+	result = importer.import_file(user.id, BytesIO(data), "csv", batch_size=1)
+
+	assert result.runs == 0
+	assert result.errors == ["line 3: distance must be a non-negative number",
+							 "line 4: date must be YYYY-MM-DD, not '03/06/2019'"]
+	assert Run.query.filter_by(user_id=user.id).count() == 0
+
+
+def test_read_gpx():
+	"""each GPX track becomes a run dated by its first point"""
+	result = importer.ImportResult()
+	rows = list(importer.read_gpx(BytesIO(GPX), result))
+
+	assert result.errors == []
+	assert [(row.kind, str(row.date), row.distance) for row in rows] == \
+		[("run", "2019-03-04", 1.38), ("run", "2019-03-06", 0.69)]
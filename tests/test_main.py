@@ -0,0 +1,42 @@
+"""Tests for the pages of a user's weeks"""
+
+from datetime import date, datetime, timedelta
+
+from runtrack.controllers.main import week_page
+from runtrack.models.tables import User, Run, Goal
+from runtrack.models import weekly_summary
+
+
+def test_week_page_skips_mondays_with_nothing_in_them(app, db):
+	"""a summary Monday left with float residue is not a week, and does not shorten a page"""
+	app.config["RUNS_PAGE_WEEKS"] = 2
+	user = User(email="pager@example.com", name="pager")
+	db.session.add(user)
+	db.session.commit()
+
+	mondays = [date(2026, 9, 7) + timedelta(weeks=week) for week in range(5)]
+	for monday in mondays[:2] + mondays[3:]:
+		run = Run(user_id=user.id, date=monday, distance=3.0)
+		db.session.add(run)
+		weekly_summary.record_run(run)
+	# a goal changed 5 -> 0.1 -> 0 leaves a goal_total of about -3.6e-16
+	goal = Goal(user_id=user.id, date=mondays[2], distance=5.0)
+	db.session.add(goal)
+	weekly_summary.record_goal(goal)
+	for distance in (0.1, 0.0):
+		previous_distance, goal.distance = goal.distance, distance
+		weekly_summary.record_goal(goal, previous_distance)
+	db.session.commit()
+	assert mondays[2] in weekly_summary.mondays_before(user.id)
+
+	seen, before = [], None
+	while True:
+		weeks, older_week, next_before = week_page(user.id, before)
+		seen.extend(week.monday for week in weeks)
+		if next_before is None:
+			assert older_week is None
+			break
+		assert older_week is not None and older_week.monday < weeks[-1].monday
+		before = datetime.strptime(next_before, "%Y-%m-%d").date()
+
+	assert seen == [mondays[4], mondays[3], mondays[1], mondays[0]]
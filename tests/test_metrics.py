@@ -0,0 +1,88 @@
+"""Tests for the request metrics"""
+
+from runtrack import create_app
+from runtrack.metrics import Histogram
+
+SCRAPER = {"Authorization": "Bearer scraper"}
+
+
+def test_histogram_buckets_are_cumulative():
+	"""an observation counts in every bucket whose bound it does not exceed"""
+	histogram = Histogram("latency", "Latency.", ("endpoint",), buckets=(0.1, 1.0))
+	for value in (0.05, 0.1, 0.5, 3.0):
+		histogram.observe(value, ("index",))
+
+	assert list(histogram.samples()) == [
+		'latency_bucket{endpoint="index",le="0.1"} 2',
+		'latency_bucket{endpoint="index",le="1.0"} 3',
+		'latency_bucket{endpoint="index",le="+Inf"} 4',
+		'latency_sum{endpoint="index"} 3.65',
+		'latency_count{endpoint="index"} 4',
+	]
+
+
+def test_metrics_endpoint_reports_requests_and_sql(app, db, add_user, login_client):
+	"""requests are counted by endpoint, with the SQL they ran"""
+	client = login_client(add_user(10))
+	client.get("/api/charts/alltime")
+	client.get("/api/charts/alltime")
+
+	text = client.get("/metrics", headers=SCRAPER).get_data(as_text=True)
+
+	assert '# TYPE runtrack_request_duration_seconds histogram' in text
+	assert 'runtrack_requests_total{endpoint="api.alltime_chart",method="GET",status="200"} 2' in text
+	assert 'runtrack_request_duration_seconds_count{endpoint="api.alltime_chart",method="GET"} 2' in text
+	assert 'runtrack_request_sql_statements_count{endpoint="api.alltime_chart"} 2' in text
+	sql_sum = text.split('runtrack_request_sql_statements_sum{endpoint="api.alltime_chart"} ')[1].split()[0]
+	assert float(sql_sum) > 0
+
+
+def test_metrics_endpoint_reports_templates(app):
+	"""template render times are recorded by template name"""
+	client = app.test_client()
+	client.get("/login")
+
+	text = client.get("/metrics", headers=SCRAPER).get_data(as_text=True)
+
+	assert 'runtrack_template_render_seconds_count{template="auth/login.html"} 1' in text
+
+
+def test_metrics_endpoint_reports_cache_counters(app, db, add_user, login_client):
+	"""the cache backend's hits, misses and size are served with the request metrics"""
+	client = login_client(add_user(11))
+	client.get("/api/charts/alltime")
+	client.get("/api/charts/alltime")
+
+	text = client.get("/metrics", headers=SCRAPER).get_data(as_text=True)
+	stats = app.extensions["cache"].stats()
+
+	assert stats["hits"] and stats["misses"]
+	assert "# TYPE runtrack_cache_hits_total counter" in text
+	assert "runtrack_cache_hits_total {}".format(stats["hits"]) in text
+	assert "runtrack_cache_misses_total {}".format(stats["misses"]) in text
+	assert "runtrack_cache_size {}".format(stats["size"]) in text
+
+
+def test_metrics_endpoint_needs_token_or_allowed_address(app):
+	"""the metrics are hidden from clients without the token or an allowed address"""
+	client = app.test_client()
+
+	assert client.get("/metrics").status_code == 404
+	assert client.get("/metrics", headers={"Authorization": "Bearer guess"}).status_code == 404
+	assert client.get("/metrics", headers=SCRAPER).status_code == 200
+
+	app.config["METRICS_ALLOWED_ADDRESSES"] = ["10.0.0.5"]
+	assert client.get("/metrics", environ_base={"REMOTE_ADDR": "10.0.0.5"}).status_code == 200
+	assert client.get("/metrics", environ_base={"REMOTE_ADDR": "10.0.0.6"}).status_code == 404
+
+
+def test_metrics_disabled_by_default(app_config):
+	"""without METRICS_ENABLED there is no metrics endpoint or instrumentation"""
+
+	class DisabledConfig(app_config):
+		METRICS_ENABLED = False
+
+	app = create_app(DisabledConfig)
+
+	assert "metrics" not in app.extensions
+	assert "metrics" not in app.view_functions
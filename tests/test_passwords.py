@@ -0,0 +1,81 @@
+"""Tests for password hashing parameters and rehashing on login"""
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from runtrack import create_app
+from runtrack.models.tables import User, hash_method
+
+
+def add_login_user(db, password_hash):
+	"""adds a user with a given password hash"""
+	user = User(email="hash@example.com", name="hash", password_hash=password_hash)
+	db.session.add(user)
+	db.session.commit()
+	return user.id
+
+
+def test_set_password_uses_config(app, db):
+	"""new hashes use the configured method and iterations"""
+	user = User(email="config@example.com", name="config")
+	user.set_password("secret")
+
+	assert user.password_hash.startswith("pbkdf2:sha256:1000$")
+	assert user.check_password("secret") and not user.password_needs_rehash()
+
+
+def test_login_rehashes_old_parameters(app, db):
+	"""a successful login upgrades a hash made with other parameters; a failed one does not"""
+	old_hash = generate_password_hash("secret", method="pbkdf2:sha256:500")
+	user_id = add_login_user(db, old_hash)
+	client = app.test_client()
+
+	client.post("/login", data={"email": "hash@example.com", "password": "wrong"})
+	assert User.query.get(user_id).password_hash == old_hash
+
+	response = client.post("/login", data={"email": "hash@example.com", "password": "secret"})
+	user = User.query.get(user_id)
+	assert response.status_code == 302
+	assert user.password_hash.startswith("pbkdf2:sha256:1000$")
+	assert user.check_password("secret")
+
+
+def test_unset_iterations_keep_stored_hashes(app, db):
+	"""without a configured count, hashes with any pbkdf2 count are current"""
+	app.config["PASSWORD_HASH_ITERATIONS"] = None
+	user = User(email="default@example.com", name="default",
+				password_hash=generate_password_hash("secret", method="pbkdf2:sha256:50000"))
+	assert not user.password_needs_rehash()
+
+	user.set_password("secret")
+	assert not user.password_needs_rehash()
+
+	user.password_hash = generate_password_hash("secret", method="pbkdf2:sha512:50000")
+	assert user.password_needs_rehash()
+
+
+def test_iterations_in_the_method_are_compared(app, db):
+	"""a count given in PASSWORD_HASH_METHOD is compared like PASSWORD_HASH_ITERATIONS"""
+	app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:2000"
+	app.config["PASSWORD_HASH_ITERATIONS"] = None
+	user = User(email="method@example.com", name="method")
+	user.set_password("secret")
+
+	assert user.password_hash.startswith("pbkdf2:sha256:2000$")
+	assert not user.password_needs_rehash()
+
+
+def test_iterations_must_be_positive(app_config):
+	"""zero or negative iteration counts are rejected"""
+	assert hash_method("pbkdf2:sha256", 1000) == "pbkdf2:sha256:1000"
+	assert hash_method("pbkdf2:sha256") == "pbkdf2:sha256"
+	with pytest.raises(ValueError):
+		hash_method("pbkdf2:sha256", 0)
+	with pytest.raises(ValueError):
+		hash_method("pbkdf2:sha256:0")
+
+	class ZeroIterations(app_config):
+		PASSWORD_HASH_ITERATIONS = 0
+
+	with pytest.raises(RuntimeError):
+		create_app(ZeroIterations)
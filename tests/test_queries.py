@@ -0,0 +1,78 @@
+"""Tests that the SQL aggregates agree with the Runs and GroupGoalRuns models"""
+
+from datetime import date, timedelta
+
+from runtrack.models.runs import Runs
+from runtrack.models.group_goal_runs import GroupGoalRuns
+from runtrack.models import queries
+from runtrack.models.records import RunRecord, GoalRecord
+
+
+def test_daily_distances_between(db, add_user):
+	"""daily totals from SQL match Runs.daily_distances_between"""
+	for seed in range(5):
+		user = add_user(seed)
+		first_day = min(run.date for run in user.runs)
+		for start_date in (first_day, first_day + timedelta(days=30), date.today() - timedelta(days=6)):
+			end_date = start_date + timedelta(days=20)
+			assert queries.daily_distances_between(user.id, start_date, end_date) == \
+				Runs(user.runs).daily_distances_between(start_date, end_date)
+
+
+def test_weekly_distances(db, add_user):
+	"""weekly totals from SQL match GroupGoalRuns.weekly(dummy=True)"""
+	for seed in range(5):
+		user = add_user(seed)
+		weeks = GroupGoalRuns(user.goals, user.runs).weekly(dummy=True, at_least=4)
+		assert queries.weekly_distances(user.id, at_least=4) == [(week.monday, week.sum_runs()) for week in weeks]
+
+
+def test_weekly_totals(db, add_user):
+	"""weekly run and goal totals from SQL match GroupGoalRuns.weekly()"""
+	user = add_user(7)
+	weeks = GroupGoalRuns(user.goals, user.runs).weekly()
+	assert [row for row in queries.weekly_totals(user.id) if row[1] or row[2]] == \
+		[(week.monday, week.sum_runs(), week.sum_goals()) for week in weeks]
+
+
+def test_load_window(db, add_user):
+	"""load_window returns only the goals and main in the window, in date order"""
+	user = add_user(2)
+	start_date = min(run.date for run in user.runs) + timedelta(days=10)
+	end_date = start_date + timedelta(days=27)
+	goals, runs = queries.load_window(user.id, start_date, end_date)
+
+	assert [run.date for run in runs] == sorted(run.date for run in user.runs if start_date <= run.date <= end_date)
+	assert [goal.date for goal in goals] == sorted(goal.date for goal in user.goals if start_date <= goal.date <= end_date)
+	assert len(queries.load_window(user.id)[1]) == len(user.runs)
+
+
+def test_load_window_records_match_orm_objects(db, add_user):
+	"""the records load_window returns give the same weeks as the ORM objects"""
+	user = add_user(3)
+	goals, runs = queries.load_window(user.id)
+
+	assert all(type(run) is RunRecord for run in runs) and all(type(goal) is GoalRecord for goal in goals)
+	from_records = GroupGoalRuns(goals, runs).weekly(dummy=True)
+	from_objects = GroupGoalRuns(user.goals, user.runs).weekly(dummy=True)
+	assert [(week.monday, week.sum_runs(), week.sum_goals(), week.longest_run().distance) for week in from_records] == \
+		[(week.monday, week.sum_runs(), week.sum_goals(), week.longest_run().distance) for week in from_objects]
+
+
+def test_stream_window(db, add_user):
+	"""streamed records match load_window"""
+	user = add_user(7)
+	start_date = min(run.date for run in user.runs) + timedelta(days=10)
+	end_date = start_date + timedelta(days=60)
+
+	goals, runs = queries.stream_window(user.id, start_date, end_date, batch_size=3)
+	assert (list(goals), list(runs)) == queries.load_window(user.id, start_date, end_date)
+
+
+def test_load_runs(db, add_user):
+	"""load_runs gives the runs of load_window without querying goals"""
+	user = add_user(8)
+	start_date = min(run.date for run in user.runs) + timedelta(days=5)
+	end_date = start_date + timedelta(days=40)
+
+	assert queries.load_runs(user.id, start_date, end_date) == queries.load_window(user.id, start_date, end_date)[1]
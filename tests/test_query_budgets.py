@@ -0,0 +1,78 @@
+"""Limits on the number of SQL statements each route runs"""
+
+from datetime import date
+
+from runtrack.models.tables import User
+from runtrack.models import identity
+
+
+def remembered_client(login_client, user):
+	"""test client with user logged in and their identity cached, as after logging in"""
+	identity.remember(user)
+	return login_client(user)
+
+
+def test_login_budget(app, db, query_budget):
+	"""logging in looks the user up once; the form itself runs no SQL"""
+	user = User(email="login@example.com", name="login")
+	user.set_password("secret")
+	db.session.add(user)
+	db.session.commit()
+	client = app.test_client()
+
+	with query_budget(0):
+		assert client.get("/login").status_code == 200
+	with query_budget(1):
+		response = client.post("/login", data={"email": "login@example.com", "password": "secret"})
+		assert response.status_code == 302
+
+
+def test_index_budget(app, db, query_budget, add_user, login_client):
+	"""the index page runs no SQL once the user's identity is cached; its charts fetch their data separately"""
+	client = login_client(add_user(11))
+
+	with query_budget(1):
+		assert client.get("/index").status_code == 200
+	with query_budget(0):
+		assert client.get("/index").status_code == 200
+
+
+def test_runs_budget(app, db, query_budget, add_user, login_client):
+	"""one page of weeks takes the page's Mondays, and its goals and runs"""
+	client = remembered_client(login_client, add_user(12))
+
+	with query_budget(3):
+		assert client.get("/main").status_code == 200
+
+
+def test_add_run_budget(app, db, query_budget, add_user, login_client):
+	"""adding a run inserts it and updates its week's summary and the data version"""
+	client = remembered_client(login_client, add_user(13))
+
+	with query_budget(4):
+		response = client.post("/add_run", data={"distance": "3.1", "date": date.today().isoformat()})
+		assert response.status_code == 302
+
+
+def test_add_goal_budget(app, db, query_budget, add_user, login_client):
+	"""updating a goal looks it up once, then updates it, its week's summary and the data version"""
+	user = add_user(14)
+	goal_date = user.goals[0].date.isoformat()
+	client = remembered_client(login_client, user)
+
+	with query_budget(5):
+		response = client.post("/add_goal", data={"distance": "5", "date": goal_date})
+		assert response.status_code == 302
+
+
+def test_logout_forgets_identity(app, db, query_budget, add_user, login_client):
+	"""after logging out and back in, the user is loaded from the database again"""
+	user = add_user(15)
+	user_id = user.id
+	client = remembered_client(login_client, user)
+	client.get("/logout")
+
+	with client.session_transaction() as session:
+		session["_user_id"] = str(user_id)
+	with query_budget(1):
+		assert client.get("/index").status_code == 200
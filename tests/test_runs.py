@@ -0,0 +1,170 @@
+"""Tests for the Runs and RunsArray classes"""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from runtrack.models.tables import Run
+from runtrack.models.runs import Runs
+from runtrack.models.runs_array import RunsArray
+
+START = date(2018, 8, 6)
+
+
+def make_runs(count, days=60, seed=0):
+	"""builds a shuffled list of Run objects spread over a number of days"""
+	rand = random.Random(seed)
+	return [Run(date=START + timedelta(days=rand.randrange(days)), distance=float(rand.randint(1, 20)))
+			for _ in range(count)]
+
+
+def test_runs_array_matches_runs():
+	"""RunsArray gives the same results as Runs"""
+	runs = make_runs(200)
+	reference, columnar = Runs(runs), RunsArray(runs)
+
+	assert len(columnar) == len(reference)
+	assert columnar.date == reference.date
+	assert columnar.sum() == reference.sum()
+	assert columnar.average() == reference.average()
+	assert columnar.longest_run().distance == reference.longest_run().distance
+	assert [r.date for r in columnar] == [r.date for r in reference]
+
+	start, end = START + timedelta(days=10), START + timedelta(days=16)
+	assert columnar.interval(start, end).sum() == reference.interval(start, end).sum()
+	assert columnar.daily_distances_between(start, end) == reference.daily_distances_between(start, end)
+	assert [d.date for d in columnar.daily()] == [d.date for d in reference.daily()]
+	assert [d.sum() for d in columnar.daily()] == [d.sum() for d in reference.daily()]
+
+
+def test_runs_array_add():
+	"""adding main keeps RunsArray sorted"""
+	runs = make_runs(50)
+	columnar = RunsArray(runs[:25])
+	columnar.add_all(runs[25:40])
+	for run in runs[40:]:
+		columnar.add(run)
+
+	assert [r.date for r in columnar] == [r.date for r in Runs(runs)]
+	assert columnar.sum() == Runs(runs).sum()
+
+
+def test_runs_array_empty():
+	"""an empty RunsArray behaves like an empty Runs"""
+	columnar = RunsArray()
+	assert columnar.empty() and columnar.one_day()
+	assert columnar.sum() == 0 and columnar.average() == 0
+	assert columnar.daily() == []
+	assert columnar.daily_distances_between(START, START + timedelta(days=2)) == [0, 0, 0]
+
+
+def test_runs_add_keeps_order():
+	"""single and bulk inserts keep Runs sorted, with new main first on ties"""
+	runs = make_runs(60)
+	indexed = Runs(runs[:20])
+	indexed.add_all(runs[20:40])
+	for run in runs[40:]:
+		indexed.add(run)
+
+	assert [r.date for r in indexed] == sorted(r.date for r in runs)
+	assert indexed.date == min(r.date for r in runs)
+
+	tied = Run(date=indexed.first().date, distance=1.0)
+	indexed.add(tied)
+	assert indexed.first() is tied
+
+
+def test_runs_interval():
+	"""interval returns exactly the main inside the bounds"""
+	runs = make_runs(100)
+	start, end = START + timedelta(days=5), START + timedelta(days=11)
+	interval = Runs(runs).interval(start, end)
+
+	assert sorted(r.date for r in interval) == sorted(r.date for r in runs if start <= r.date <= end)
+	assert interval.date == min(r.date for r in runs if start <= r.date <= end)
+	assert Runs().interval(start, end).empty()
+
+
+def test_runs_daily():
+	"""daily groups main into one sorted Runs object per day"""
+	runs = make_runs(80, days=20)
+	daily = Runs(runs).daily()
+
+	assert [d.date for d in daily] == sorted(set(r.date for r in runs))
+	assert all(d.one_day() for d in daily)
+	assert sum(len(d) for d in daily) == len(runs)
+	assert Runs().daily() == []
+
+
+def test_runs_sum_between():
+	"""range totals include exactly the main in the interval, as main are added"""
+	runs = make_runs(120)
+	indexed = Runs(runs[:60])
+	start, end = START + timedelta(days=3), START + timedelta(days=40)
+	indexed.sum_between(start, end)
+
+	indexed.add_all(runs[60:90])
+	for run in runs[90:]:
+		indexed.add(run)
+
+	expected = sum(r.distance for r in runs if start <= r.date <= end)
+	assert indexed.sum_between(start, end) == expected
+	assert indexed.sum() == sum(r.distance for r in runs)
+	assert RunsArray(runs).sum_between(start, end) == expected
+
+
+def test_runs_array_rolling_windows():
+	"""rolling totals, averages and workload ratios match sums over each window"""
+	runs = make_runs(300, days=120)
+	reference, columnar = Runs(runs), RunsArray(runs)
+	start, end = START - timedelta(days=10), START + timedelta(days=130)
+	days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+	def window(day, length):
+		return reference.interval(day - timedelta(days=length - 1), day)
+
+	assert columnar.rolling_totals_between(start, end) == \
+		pytest.approx([window(day, 7).sum() for day in days])
+	assert columnar.rolling_totals_between(start, end, 28) == \
+		pytest.approx([window(day, 28).sum() for day in days])
+	assert columnar.rolling_average_run_between(start, end, 28) == \
+		pytest.approx([window(day, 28).average() for day in days])
+
+	load = columnar.training_load_between(start, end)
+	assert load["acute"] == columnar.rolling_totals_between(start, end, 7)
+	assert load["chronic"] == columnar.rolling_totals_between(start, end, 28)
+	assert load["average_run"] == columnar.rolling_average_run_between(start, end, 28)
+
+	ratios = columnar.workload_ratio_between(start, end)
+	assert ratios == load["ratio"]
+	for day, ratio in zip(days, ratios):
+		chronic = window(day, 28).sum()
+		if chronic:
+			assert ratio == pytest.approx(window(day, 7).sum() / (chronic / 4))
+		else:
+			assert ratio is None
+
+
+def test_runs_array_rolling_windows_edge_cases():
+	"""rolling windows of empty arrays are zero, and bad intervals or windows are rejected"""
+	empty, runs = RunsArray(), make_runs(10)
+
+	assert empty.rolling_totals_between(START, START + timedelta(days=2)) == [0, 0, 0]
+	assert empty.rolling_average_run_between(START, START) == [0]
+	assert empty.workload_ratio_between(START, START) == [None]
+	assert RunsArray(runs).rolling_totals_between(START, START, 1) == [sum(r.distance for r in runs if r.date == START)]
+
+	with pytest.raises(ValueError):
+		empty.rolling_totals_between(START, START - timedelta(days=1))
+	with pytest.raises(ValueError):
+		empty.rolling_totals_between(START, START, 0)
+
+
+def test_runs_daily_distances_are_plain_sums():
+	"""each day's distance is the plain sum of that day's main"""
+	runs = [Run(date=START, distance=0.1), Run(date=START + timedelta(days=1), distance=0.2),
+			Run(date=START + timedelta(days=2), distance=3.1)]
+
+	assert Runs(runs).daily_distances_between(START, START + timedelta(days=3)) == [0.1, 0.2, 3.1, 0]
+	assert Runs(runs).sum_between(START + timedelta(days=1), START + timedelta(days=1)) == 0.2
@@ -0,0 +1,139 @@
+"""Tests for the weekly_summary table maintenance"""
+
+import importlib.util
+import os
+from datetime import date
+
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query
+
+from runtrack.commands import backfill_summaries
+from runtrack.models.tables import User, Goal, WeeklySummary
+from runtrack.models.group_goal_runs import GroupGoalRuns
+from runtrack.models import weekly_summary
+
+
+def test_recorded_summaries_match_rebuild(db, add_user, summary_rows):
+	"""summaries maintained on write equal summaries rebuilt from scratch"""
+	user = add_user(3)
+	recorded = summary_rows(user)
+
+	weekly_summary.rebuild(user)
+	db.session.commit()
+	assert summary_rows(user) == recorded
+
+
+def test_weekly_totals_match_group_goal_runs(db, add_user):
+	"""weekly_totals gives the same series as GroupGoalRuns.weekly(dummy=True)"""
+	user = add_user(4)
+	weeks = GroupGoalRuns(user.goals, user.runs).weekly(dummy=True, at_least=4)
+
+	assert weekly_summary.weekly_totals(user.id, at_least=4) == \
+		[(week.monday, week.sum_runs()) for week in weeks]
+	assert len(weekly_summary.weekly_totals(-1, at_least=4)) == 4
+
+
+def test_mondays_before_pages_through_history(db, add_user):
+	"""paging with mondays_before visits every week with data exactly once"""
+	user = add_user(5)
+	expected = [week.monday for week in GroupGoalRuns(user.goals, user.runs).weekly()][::-1]
+
+	seen, before = [], None
+	while True:
+		page = weekly_summary.mondays_before(user.id, before, limit=4)
+		if not page:
+			break
+		seen.extend(page)
+		before = page[-1]
+
+	assert seen == expected
+
+
+def test_add_to_week_increments_in_place(db, summary_rows):
+	"""add_to_week adds to an existing row and keeps the longer of the longest runs"""
+	user = User(email="weekly@example.com", name="runner")
+	db.session.add(user)
+	db.session.commit()
+	monday = date(2019, 1, 7)
+
+	weekly_summary.add_to_week(user.id, monday, distance=5, goal=10, runs=1, longest=5)
+	weekly_summary.add_to_week(user.id, monday, distance=3, goal=-4, runs=1, longest=3)
+	weekly_summary.add_to_week(user.id, monday, distance=8, runs=1, longest=8)
+	db.session.commit()
+
+	assert summary_rows(user) == [(monday, 16, 6, 3, 8)]
+
+
+def test_add_to_week_upserts_on_postgresql():
+	"""on PostgreSQL the first write to a week cannot collide with a concurrent one"""
+	sql = str(weekly_summary._upsert(1, date(2019, 1, 7), {"total_distance": 5, "goal_total": 0, "run_count": 1,
+															"longest_run": 5}).compile(dialect=postgresql.dialect()))
+
+	assert "ON CONFLICT (user_id, monday) DO UPDATE" in sql
+	assert "weekly_summary.total_distance + excluded.total_distance" in sql
+	assert "GREATEST(weekly_summary.longest_run, excluded.longest_run)" in sql
+
+
+def test_goal_update_locks_the_goal(app, db, login_client, summary_rows):
+	"""an updated goal is read with FOR UPDATE, so concurrent updates add consecutive deltas"""
+	user = User(email="goal@example.com", name="runner")
+	db.session.add(user)
+	db.session.commit()
+	user_id = user.id
+	client = login_client(user)
+
+	goal_queries = []
+
+	def record(query):
+		if query.column_descriptions[0]["type"] is Goal:
+			goal_queries.append(query)
+
+	event.listen(Query, "before_compile", record)
+	try:
+		client.post("/add_goal", data={"distance": "5", "date": "2019-01-07"})
+		client.post("/add_goal", data={"distance": "8", "date": "2019-01-07"})
+	finally:
+		event.remove(Query, "before_compile", record)
+
+	assert len(goal_queries) == 2
+	for query in goal_queries:
+		assert str(query.statement.compile(dialect=postgresql.dialect())).endswith("FOR UPDATE")
+	assert summary_rows(User.query.get(user_id)) == [(date(2019, 1, 7), 0, 8, 0, 0)]
+
+
+def test_backfill_migration_matches_rebuild(db, add_user, summary_rows):
+	"""the migration that backfills existing users' summaries gives the same rows as rebuild"""
+	path = os.path.join(os.path.dirname(__file__), "..", "migrations", "versions",
+						"f3a8c1d5b7e2_backfill_weekly_summaries.py")
+	spec = importlib.util.spec_from_file_location("backfill_weekly_summaries", path)
+	migration = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(migration)
+
+	user = add_user(11)
+	version = user.data_version
+	weekly_summary.rebuild(user)
+	db.session.commit()
+	rebuilt = summary_rows(user)
+
+	for statement in migration.backfill_statements(db.engine.dialect.name):
+		db.session.execute(statement)
+	db.session.commit()
+
+	assert summary_rows(user) == rebuilt
+	assert User.query.get(user.id).data_version == version + 1
+
+
+def test_backfill_command_bumps_data_version(app, db, add_user, summary_rows):
+	"""backfill-summaries rebuilds the summaries and invalidates cached views of them"""
+	user = add_user(12)
+	recorded, version = summary_rows(user), user.data_version
+	WeeklySummary.query.filter_by(user_id=user.id).delete()
+	db.session.commit()
+
+	result = app.test_cli_runner().invoke(backfill_summaries, ["--user-id", str(user.id)])
+
+	assert result.exit_code == 0
+	db.session.expire_all()
+	assert summary_rows(user) == recorded
+	assert User.query.get(user.id).data_version == version + 1